@@ -0,0 +1,85 @@
+"""Read CVE files directly from a cvelistV5 release archive (zip or tar.gz).
+
+Members are read sequentially in a separate thread, which turns the load
+into one large sequential read instead of opening ~250k small files.
+"""
+
+import os
+import re
+import tarfile
+import time
+import zipfile
+from contextlib import aclosing
+from typing import AsyncIterator, Callable, Iterator
+
+from app.pipeline import CveFile
+from app.scanner import CHUNK_SIZE, Shard
+from app.utils import iterate_in_threads
+
+
+CVE_MEMBER_RE = re.compile(r'(?:^|/)cves/(\d{4})/[^/]+/(CVE-[^/]+\.json)$')
+
+
+def is_cve_member(name: str, shard: Shard | None) -> bool:
+    match = CVE_MEMBER_RE.search(name)
+    if match is None:
+        return False
+    year, file_name = match.groups()
+    return shard is None or (shard.has_year(year) and shard.has_file(file_name))
+
+
+def iter_zip_members(archive: zipfile.ZipFile, shard: Shard | None) -> Iterator[CveFile]:
+    for info in archive.infolist():
+        if info.filename.endswith('.zip'):
+            # release archives contain a nested zip with the CVE tree
+            with archive.open(info) as nested_file, zipfile.ZipFile(nested_file) as nested:
+                yield from iter_zip_members(nested, shard)
+        elif is_cve_member(info.filename, shard):
+            mtime_ns = int(time.mktime(info.date_time + (0, 0, -1))) * 1_000_000_000
+            yield CveFile(info.filename, info.file_size, mtime_ns, archive.read(info))
+
+
+def iter_tar_members(archive: tarfile.TarFile, shard: Shard | None) -> Iterator[CveFile]:
+    for member in archive:
+        if member.isfile() and is_cve_member(member.name, shard):
+            content = archive.extractfile(member).read()
+            yield CveFile(member.name, member.size, int(member.mtime) * 1_000_000_000, content)
+
+
+def iter_archive(path: str, shard: Shard | None = None) -> Iterator[CveFile]:
+    """Yields CVE files of the archive in the order they are stored"""
+
+    if zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as archive:
+            yield from iter_zip_members(archive, shard)
+    else:
+        # stream mode: members are read one after another without seeking
+        with tarfile.open(path, 'r|*') as archive:
+            yield from iter_tar_members(archive, shard)
+
+
+async def read_archive(
+    path: str,
+    shard: Shard | None = None,
+    queue_size: int = 100,
+) -> AsyncIterator[CveFile]:
+    """Yields CVE files of the archive while it is being read in a thread"""
+
+    if not os.path.isfile(path):
+        raise FileNotFoundError(path)
+
+    def read(put: Callable[[list], None]):
+        chunk = []
+        for cve_file in iter_archive(path, shard):
+            chunk.append(cve_file)
+            if len(chunk) >= CHUNK_SIZE:
+                put(chunk)
+                chunk = []
+        if chunk:
+            put(chunk)
+
+    # stops the reading thread as soon as the caller stops iterating
+    async with aclosing(iterate_in_threads([read], queue_size=queue_size)) as chunks:
+        async for chunk in chunks:
+            for cve_file in chunk:
+                yield cve_file
@@ -0,0 +1,76 @@
+"""Bulk-load mode: drop secondary indexes and foreign keys during a full load.
+
+Maintaining indexes and checking foreign keys row by row is slower than
+building indexes once and validating constraints in one pass after the
+load. Statements to restore everything are saved into a file before
+anything is dropped, so they can be applied by hand if the load is killed.
+"""
+
+import logging
+
+from sqlalchemy import text
+
+from app.db import get_engine
+
+
+logger = logging.getLogger(__name__)
+
+TABLES = ['cves', 'cna_containers', 'adp_containers', 'cve_documents']
+
+# indexes backing primary keys and unique constraints are kept
+INDEXES_SQL = """
+SELECT indexname, indexdef
+FROM pg_indexes
+WHERE schemaname = current_schema()
+  AND tablename = ANY(:tables)
+  AND indexname NOT IN (
+      SELECT conname FROM pg_constraint WHERE contype IN ('p', 'u')
+  )
+"""
+FOREIGN_KEYS_SQL = """
+SELECT conrelid::regclass::text AS table_name, conname, pg_get_constraintdef(oid) AS definition
+FROM pg_constraint
+WHERE contype = 'f' AND conrelid::regclass::text = ANY(:tables)
+"""
+# memory for sorting while building indexes
+MAINTENANCE_WORK_MEM = '512MB'
+
+
+async def drop_indexes(restore_path: str) -> list[str]:
+    """Drop secondary indexes and foreign keys, return statements to restore them"""
+
+    engine = get_engine()
+    async with engine.begin() as conn:
+        indexes = (await conn.execute(text(INDEXES_SQL), {'tables': TABLES})).all()
+        foreign_keys = (await conn.execute(text(FOREIGN_KEYS_SQL), {'tables': TABLES})).all()
+
+        restore_statements = [f'{index.indexdef};' for index in indexes] + [
+            f'ALTER TABLE {fk.table_name} ADD CONSTRAINT {fk.conname} {fk.definition};'
+            for fk in foreign_keys
+        ]
+        with open(restore_path, 'w') as f:
+            f.write('\n'.join(restore_statements) + '\n')
+        logger.info(f'Statements to restore indexes and foreign keys are saved into {restore_path}')
+
+        for fk in foreign_keys:
+            await conn.execute(text(f'ALTER TABLE {fk.table_name} DROP CONSTRAINT {fk.conname}'))
+        for index in indexes:
+            await conn.execute(text(f'DROP INDEX {index.indexname}'))
+    await engine.dispose()
+
+    logger.info(f'Dropped {len(indexes)} indexes and {len(foreign_keys)} foreign keys for bulk load')
+    return restore_statements
+
+
+async def restore_indexes(restore_statements: list[str]):
+    engine = get_engine()
+    async with engine.begin() as conn:
+        await conn.execute(text(f"SET LOCAL maintenance_work_mem = '{MAINTENANCE_WORK_MEM}'"))
+        for statement in restore_statements:
+            await conn.execute(text(statement.rstrip(';')))
+        # fresh statistics for the planner after the load
+        for table in TABLES:
+            # cve_documents exists only if migrations of lesson8 are applied
+            if await conn.scalar(text('SELECT to_regclass(:table) IS NOT NULL'), {'table': table}):
+                await conn.execute(text(f'ANALYZE {table}'))
+    await engine.dispose()
@@ -0,0 +1,128 @@
+"""Coordinator mode: split CVE tree into shards and load them by worker processes.
+
+Every worker has its own event loop and connection pool. The total number
+of connections (--max-connections) is split between workers, so they can't
+exhaust `max_connections` of Postgres. Workers send progress and results
+to the coordinator through a queue.
+"""
+
+import argparse
+import asyncio
+import copy
+import logging
+import multiprocessing as mp
+import queue
+import time
+import traceback
+
+from app.loader import load
+from app.metrics import Metrics, format_progress
+
+
+logger = logging.getLogger(__name__)
+
+
+def run_worker(args: argparse.Namespace, index: int, messages: mp.Queue):
+    def on_progress(counters: dict[str, int], scan_done: bool):
+        messages.put(('progress', index, counters, scan_done))
+
+    try:
+        metrics = asyncio.run(load(args, on_progress))
+    except BaseException:
+        messages.put(('failed', index, traceback.format_exc()))
+        raise
+    messages.put(('done', index, metrics))
+
+
+def make_worker_args(args: argparse.Namespace, index: int, processes: int) -> argparse.Namespace:
+    worker_args = copy.copy(args)
+    worker_args.shard = f'{index}/{processes}'
+    worker_args.processes = 1
+    worker_args.max_connections = args.max_connections // processes
+    # parse processes are shared between workers too
+    worker_args.parse_processes = args.parse_processes // processes
+    return worker_args
+
+
+def find_dead_workers(workers: list[mp.Process], finished: set[int]) -> list[tuple[int, int]]:
+    """Workers killed without a message (e.g. by OOM killer): (index, exit code)"""
+
+    return [
+        (index, worker.exitcode)
+        for index, worker in enumerate(workers)
+        if index not in finished and worker.exitcode not in (0, None)
+    ]
+
+
+def run_coordinator(args: argparse.Namespace) -> tuple[Metrics, dict[int, str]]:
+    """Returns merged metrics of workers and failures of workers by index"""
+
+    processes = min(args.processes, args.max_connections)
+    if processes < args.processes:
+        logger.warning(
+            f'Only {processes} workers are started: every worker needs at least one of '
+            f'{args.max_connections} connections'
+        )
+
+    context = mp.get_context('spawn')
+    messages = context.Queue()
+    workers = [
+        context.Process(
+            target=run_worker,
+            args=(make_worker_args(args, index, processes), index, messages),
+            name=f'cve-loader-{index}',
+        )
+        for index in range(processes)
+    ]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    logger.info(
+        f'Started {processes} workers, {args.max_connections // processes} DB connections each'
+    )
+
+    progress = {}
+    scan_done = {}
+    results = {}
+    failures = {}
+    last_log = time.perf_counter()
+    while len(results) + len(failures) < processes:
+        try:
+            message = messages.get(timeout=args.monitor_interval)
+        except queue.Empty:
+            message = None
+
+        if message is not None:
+            kind, index, *payload = message
+            if kind == 'progress':
+                progress[index], scan_done[index] = payload
+            elif kind == 'done':
+                results[index] = payload[0]
+            elif kind == 'failed':
+                failures[index] = payload[0]
+                logger.error(f'Worker {index} failed:\n{payload[0]}')
+
+        # checked after every message, progress of other workers doesn't delay it
+        for index, exitcode in find_dead_workers(workers, results.keys() | failures.keys()):
+            failures[index] = f'exit code {exitcode}'
+            logger.error(f'Worker {index} exited with code {exitcode}')
+
+        if time.perf_counter() - last_log >= args.monitor_interval:
+            last_log = time.perf_counter()
+            totals = Metrics()
+            for counters in progress.values():
+                for counter, value in counters.items():
+                    totals.increment(counter, value)
+            all_scanned = len(scan_done) == processes and all(scan_done.values())
+            logger.info(
+                f'{format_progress(totals.counters, all_scanned, last_log - start)} '
+                f'| workers: {len(results)} done, {len(failures)} failed'
+            )
+
+    for worker in workers:
+        worker.join()
+
+    metrics = Metrics()
+    for worker_metrics in results.values():
+        metrics.merge(worker_metrics)
+    return metrics, failures
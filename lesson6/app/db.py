@@ -13,8 +13,9 @@ from sqlalchemy.ext.asyncio import (
 
 from app.config import DB_URI, DB_ECHO
 
-def get_engine() -> AsyncEngine:
-    return create_async_engine(DB_URI, echo=DB_ECHO)
+def get_engine(**kwargs) -> AsyncEngine:
+    """kwargs are passed to create_async_engine, e.g. pool_size and max_overflow"""
+    return create_async_engine(DB_URI, echo=DB_ECHO, **kwargs)
 
 
 # def make_session_class(engine: AsyncEngine) -> type[AsyncSession]:
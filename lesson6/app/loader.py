@@ -0,0 +1,100 @@
+"""Load CVE files of one shard (or the whole tree) in the current process"""
+
+import argparse
+import json
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable
+
+from app.archive import read_archive
+from app.db import get_engine
+from app.manifest import Manifest
+from app.metrics import Metrics
+from app.pipeline import Pipeline
+from app.scanner import Shard, scan_cve_files
+from app.validation import Rejects
+from app.writers import WRITERS
+
+
+logger = logging.getLogger(__name__)
+
+
+async def load(
+    args: argparse.Namespace,
+    on_progress: Callable[[dict[str, int], bool], None] | None = None,
+) -> Metrics:
+    # every write worker holds one connection, pool never grows over the budget
+    engine = get_engine(pool_size=args.max_connections, max_overflow=0)
+    metrics = Metrics()
+    writer = WRITERS[args.writer](engine, upsert=args.incremental, metrics=metrics)
+    manifest = Manifest(args.manifest) if args.incremental else None
+    rejects = Rejects(args.rejects)
+    executor = ProcessPoolExecutor(args.parse_processes) if args.parse_processes else None
+    pipeline = Pipeline(
+        writer,
+        read_workers=args.read_workers,
+        parse_workers=args.parse_workers,
+        write_workers=min(args.write_workers, args.max_connections),
+        queue_size=args.queue_size,
+        batch_size=args.batch_size,
+        parse_batch_size=args.parse_batch_size,
+        store_documents=args.store_documents,
+        executor=executor,
+        manifest=manifest,
+        rejects=rejects,
+        metrics=metrics,
+        on_progress=on_progress,
+    )
+
+    shard = Shard.parse(args.shard, args.shard_by) if args.shard else None
+    try:
+        if args.archive:
+            await pipeline.run(
+                cve_files=read_archive(args.archive, shard),
+                monitor_interval=args.monitor_interval,
+            )
+        else:
+            # paths of CVE files are produced lazily while the files are being processed
+            scanned_files = scan_cve_files(
+                args.path_to_cves,
+                with_stat=args.incremental,
+                shard=shard,
+                workers=args.scan_workers,
+            )
+            await pipeline.run(scanned_files, monitor_interval=args.monitor_interval)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+        if manifest is not None:
+            manifest.close()
+        rejects.close()
+        await engine.dispose()
+
+    return metrics
+
+
+def log_summary(writer: str, metrics: Metrics, total_time: float):
+    counters = metrics.counters
+    logger.info(
+        f'{writer} writer saved {counters["files_saved"]} files, {counters["rows_saved"]} rows '
+        f'in {total_time:.2f}s ({counters["rows_saved"] / total_time:.0f} rows/s), '
+        f'skipped {counters["files_skipped"]} unchanged files, {counters["files_rejected"]} rejected'
+    )
+    for stage, histogram in metrics.stages.items():
+        logger.info(
+            f'{stage}: {histogram.total:.2f}s total, p95 {histogram.percentile(0.95) * 1000:.1f}ms'
+        )
+
+
+def save_report(path: str, writer: str, metrics: Metrics, total_time: float, **extra):
+    with open(path, 'w') as f:
+        json.dump({
+            'writer': writer,
+            'files': metrics.counters['files_saved'],
+            'rows': metrics.counters['rows_saved'],
+            'skipped': metrics.counters['files_skipped'],
+            'rejected': metrics.counters['files_rejected'],
+            'total_seconds': total_time,
+            **extra,
+            **metrics.report(),
+        }, f, indent=2)
@@ -0,0 +1,64 @@
+"""Local manifest of loaded CVE files, used for incremental and resumable loads.
+
+The manifest is a SQLite file with a row per CVE file saved into database.
+A file is recorded only after the transaction with its rows is committed,
+so the manifest also works as a checkpoint: an interrupted load started
+again skips files which were already saved.
+"""
+
+import sqlite3
+from typing import Iterable, NamedTuple
+
+
+class ManifestEntry(NamedTuple):
+    path: str
+    size: int
+    mtime_ns: int
+    date_updated: str | None
+
+
+class Manifest:
+    def __init__(self, path: str):
+        # several loader processes may write into the same manifest
+        self.connection = sqlite3.connect(path, timeout=30)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS files (
+                path TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                date_updated TEXT
+            )
+            """
+        )
+        self.connection.commit()
+
+    def get(self, path: str) -> ManifestEntry | None:
+        row = self.connection.execute(
+            "SELECT path, size, mtime_ns, date_updated FROM files WHERE path = ?", (path,)
+        ).fetchone()
+        return ManifestEntry(*row) if row else None
+
+    def is_unchanged(self, path: str, size: int, mtime_ns: int) -> bool:
+        """File has the same size and modification time as when it was loaded"""
+
+        entry = self.get(path)
+        return entry is not None and entry.size == size and entry.mtime_ns == mtime_ns
+
+    def record(self, entries: Iterable[ManifestEntry]):
+        self.connection.executemany(
+            """
+            INSERT INTO files (path, size, mtime_ns, date_updated) VALUES (?, ?, ?, ?)
+            ON CONFLICT (path) DO UPDATE SET
+                size = excluded.size,
+                mtime_ns = excluded.mtime_ns,
+                date_updated = excluded.date_updated
+            """,
+            entries,
+        )
+        self.connection.commit()
+
+    def close(self):
+        self.connection.close()
@@ -0,0 +1,137 @@
+"""Ingest metrics: latency histograms per stage and counters"""
+
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from contextlib import contextmanager
+
+
+# upper bounds of histogram buckets in seconds: 0.1ms .. ~105s
+BUCKETS = tuple(0.0001 * 2 ** i for i in range(21))
+
+
+class Histogram:
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float):
+        self.counts[bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def merge(self, other: "Histogram"):
+        self.counts = [count + other_count for count, other_count in zip(self.counts, other.counts)]
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def percentile(self, q: float) -> float:
+        """Upper bound of the bucket containing q-th percentile"""
+
+        threshold = q * self.count
+        cumulative = 0
+        for bucket, count in zip(BUCKETS, self.counts):
+            cumulative += count
+            if cumulative >= threshold:
+                return min(bucket, self.max)
+        return self.max
+
+    def report(self) -> dict:
+        return {
+            'count': self.count,
+            'total_seconds': round(self.total, 3),
+            'mean_seconds': round(self.total / self.count, 6) if self.count else 0,
+            'p50_seconds': round(self.percentile(0.5), 6),
+            'p95_seconds': round(self.percentile(0.95), 6),
+            'p99_seconds': round(self.percentile(0.99), 6),
+            'max_seconds': round(self.max, 6),
+        }
+
+
+class Metrics:
+    """Stages: read, decode, build_rows, build_objects, db_write, commit, checkpoint"""
+
+    def __init__(self):
+        self.stages = defaultdict(Histogram)
+        self.counters = defaultdict(int)
+        # sums of sampled queue sizes, to get average depth of every queue
+        self.queue_depth_sums = defaultdict(int)
+        self.queue_samples = 0
+
+    def observe(self, stage: str, seconds: float):
+        self.stages[stage].observe(seconds)
+
+    @contextmanager
+    def timer(self, stage: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    def increment(self, counter: str, value: int = 1):
+        self.counters[counter] += value
+
+    def sample_queues(self, depths: dict[str, int]):
+        for name, size in depths.items():
+            self.queue_depth_sums[name] += size
+        self.queue_samples += 1
+
+    def merge(self, other: "Metrics"):
+        """Add metrics of another loader process"""
+
+        for stage, histogram in other.stages.items():
+            self.stages[stage].merge(histogram)
+        for counter, value in other.counters.items():
+            self.counters[counter] += value
+        # sums and numbers of samples are both added: the average is over samples of all workers
+        for name, depth_sum in other.queue_depth_sums.items():
+            self.queue_depth_sums[name] += depth_sum
+        self.queue_samples += other.queue_samples
+
+    def report(self) -> dict:
+        total_stage_seconds = sum(histogram.total for histogram in self.stages.values()) or 1
+        return {
+            'stages': {
+                stage: {
+                    **histogram.report(),
+                    'time_share': round(histogram.total / total_stage_seconds, 3),
+                }
+                for stage, histogram in self.stages.items()
+            },
+            'counters': dict(self.counters),
+            # a full queue means that the stage after it is the bottleneck
+            'average_queue_depths': {
+                name: round(depth_sum / self.queue_samples, 1)
+                for name, depth_sum in self.queue_depth_sums.items()
+            } if self.queue_samples else {},
+        }
+
+
+def format_duration(seconds: float) -> str:
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f'{hours}h{minutes:02d}m{seconds:02d}s' if hours else f'{minutes}m{seconds:02d}s'
+
+
+def format_progress(counters: dict[str, int], scan_done: bool, elapsed: float) -> str:
+    """Progress line: processed files, rate, rows, MB read and ETA"""
+
+    found = counters.get('files_found', 0)
+    processed = sum(counters.get(name, 0) for name in ('files_saved', 'files_skipped', 'files_rejected'))
+    rate = processed / elapsed if elapsed else 0
+
+    if scan_done and rate:
+        eta = format_duration((found - processed) / rate)
+    else:
+        eta = 'unknown (scanning)'
+    percent = f' ({processed / found:.1%})' if found else ''
+    return (
+        f'progress: {processed}/{found}{"" if scan_done else "+"} files{percent}, '
+        f'{rate:.0f} files/s, {counters.get("rows_saved", 0)} rows, '
+        f'{counters.get("bytes_read", 0) / 2 ** 20:.1f} MB read, ETA {eta}'
+    )
@@ -2,10 +2,10 @@ from datetime import datetime
 import enum
 import uuid
 
-from sqlalchemy import CheckConstraint, String, Enum, Date, ForeignKey
+from sqlalchemy import CheckConstraint, Computed, String, Enum, Date, ForeignKey, Index, Text
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 from sqlalchemy.ext.asyncio import AsyncAttrs
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.dialects.postgresql import JSONB, UUID
 from sqlalchemy.sql import func
 
 
@@ -15,6 +15,7 @@ class CveState(enum.Enum):
     REJECTED = "REJECTED"
 
 
+# the schema is migrated by lesson8 (see its migrations), these models only mirror it
 class Base(AsyncAttrs, DeclarativeBase):
     pass
 
@@ -25,6 +26,14 @@ class CVERecord(Base):
     # __table_args__ = (
     #     CheckConstraint("id ~ '^CVE-[0-9]{4}-[0-9]{4,19}$'", name='valid_cve_id'),
     # )
+    # composite indexes of lesson8, they replaced single column indexes of the dates
+    __table_args__ = (
+        Index("ix_cves_date_published_id", "date_published", "id"),
+        Index("ix_cves_date_updated_id", "date_updated", "id"),
+        Index("ix_cves_state_date_published_id", "state", "date_published", "id"),
+        Index("ix_cves_state_date_updated_id", "state", "date_updated", "id"),
+        Index("ix_cves_assigner_short_name_date_published_id", "assigner_short_name", "date_published", "id"),
+    )
 
     id: Mapped[str] = mapped_column(
         String(length=29),
@@ -91,7 +100,7 @@ class CnaContainer(Base):
     date_assigned: Mapped[datetime] = mapped_column(Date(), nullable=True)
     date_public: Mapped[datetime] = mapped_column(Date(), nullable=True)
 
-    cve_record_id: Mapped[str] = mapped_column(ForeignKey("cves.id"), nullable=False)
+    cve_record_id: Mapped[str] = mapped_column(ForeignKey("cves.id"), nullable=False, index=True)
     cve_record: Mapped["CVERecord"] = relationship(back_populates="cna_container")
     
     def __repr__(self) -> str:
@@ -129,7 +138,7 @@ class AdpContainer(Base):
     date_assigned: Mapped[datetime] = mapped_column(Date(), nullable=True)
     date_public: Mapped[datetime] = mapped_column(Date(), nullable=True)
     
-    cve_record_id: Mapped[str] = mapped_column(ForeignKey("cves.id"), nullable=False)
+    cve_record_id: Mapped[str] = mapped_column(ForeignKey("cves.id"), nullable=False, index=True)
     cve_record: Mapped["CVERecord"] = relationship(back_populates="adp_containers")
 
     def __repr__(self) -> str:
@@ -152,4 +161,30 @@ class AdpContainer(Base):
             date_assigned=date_assigned,
             date_public=date_public,
             cve_record=cve_record
-        )
\ No newline at end of file
+        )
+
+
+class CveDocument(Base):
+    """Original JSON of CVE record, compressed with lz4 (see the migration)"""
+
+    __tablename__ = "cve_documents"
+
+    cve_id: Mapped[str] = mapped_column(String(length=29), primary_key=True)
+    document: Mapped[dict] = mapped_column(JSONB, nullable=False)
+    # hot fields are generated from the document by Postgres
+    state: Mapped[str] = mapped_column(
+        Text, Computed("document #>> '{cveMetadata,state}'", persisted=True), index=True
+    )
+    assigner_short_name: Mapped[str] = mapped_column(
+        Text, Computed("document #>> '{cveMetadata,assignerShortName}'", persisted=True), index=True
+    )
+    # ISO 8601 strings sort in the order of dates, cast to date is not immutable
+    date_updated: Mapped[str] = mapped_column(
+        Text, Computed("document #>> '{cveMetadata,dateUpdated}'", persisted=True), index=True
+    )
+    title: Mapped[str] = mapped_column(
+        Text, Computed("document #>> '{containers,cna,title}'", persisted=True)
+    )
+
+    def __repr__(self) -> str:
+        return f"<CveDocument(cve_id={self.cve_id})>"
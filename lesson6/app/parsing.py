@@ -0,0 +1,54 @@
+"""JSON decoding of CVE files. Functions of this module run in worker processes"""
+
+import json
+import time
+from typing import NamedTuple
+
+from app.rows import CveRows, make_rows
+from app.validation import InvalidCve, normalise_rows
+
+
+class ParsedCve(NamedTuple):
+    date_updated: str | None
+    rows: CveRows
+    # values truncated to fit their columns
+    truncated: int
+
+
+class Rejected(NamedTuple):
+    stage: str
+    reason: str
+
+
+class ParsedBatch(NamedTuple):
+    parsed_cves: list[ParsedCve | Rejected]
+    decode_seconds: float
+    build_seconds: float
+
+
+def parse_cve_files(contents: list[bytes], keep_documents: bool = False) -> ParsedBatch:
+    """Decode a batch of CVE files into compact rows, one bad file does not fail the batch"""
+
+    parsed_cves = []
+    decode_seconds = build_seconds = 0.0
+    for content in contents:
+        start = time.perf_counter()
+        try:
+            json_data = json.loads(content)
+        except ValueError as error:
+            parsed_cves.append(Rejected('parse', f'invalid JSON: {error}'))
+            continue
+        decoded = time.perf_counter()
+        try:
+            rows, truncated = normalise_rows(make_rows(json_data))
+            if keep_documents:
+                rows = rows._replace(document=content.decode())
+            parsed_cves.append(ParsedCve(json_data['cveMetadata'].get('dateUpdated'), rows, truncated))
+        except InvalidCve as error:
+            parsed_cves.append(Rejected('validate', str(error)))
+        except (KeyError, TypeError, AttributeError, IndexError, ValueError) as error:
+            parsed_cves.append(Rejected('parse', f'{type(error).__name__}: {error}'))
+        decode_seconds += decoded - start
+        build_seconds += time.perf_counter() - decoded
+
+    return ParsedBatch(parsed_cves, decode_seconds, build_seconds)
@@ -0,0 +1,323 @@
+"""Streaming pipeline: scan -> read -> parse -> write, connected by bounded queues.
+
+Every stage has its own pool of worker coroutines. Queues are bounded,
+so a slow stage blocks the stages in front of it (backpressure) and the
+amount of data kept in memory does not depend on the size of CVE tree.
+
+JSON decoding is CPU-bound, so the parse stage ships batches of raw file
+contents to a process pool, and gets back compact rows for the writer.
+
+With a manifest the pipeline is incremental: files with the same size and
+mtime (or the same `dateUpdated`) as in the manifest are not saved again.
+
+Bad files don't fail their batch: files which can't be read, parsed or
+validated go to the rejects file, and a batch rejected by the database is
+split in halves until the files causing the error are found.
+"""
+
+import asyncio
+import logging
+import time
+from concurrent.futures import Executor
+from typing import AsyncIterable, Callable, NamedTuple
+
+import aiofiles
+import aiofiles.os
+
+from app.manifest import Manifest, ManifestEntry
+from app.metrics import Metrics, format_progress
+from app.parsing import ParsedBatch, Rejected, parse_cve_files
+from app.rows import CveRows
+from app.scanner import ScannedFile
+from app.validation import Rejects
+from app.writers import DB_ERRORS, is_data_error
+
+
+logger = logging.getLogger(__name__)
+
+# marks the end of the stream for a worker
+DONE = object()
+
+
+class CveFile(NamedTuple):
+    path: str
+    size: int | None
+    mtime_ns: int | None
+    content: bytes
+
+
+class Batch(NamedTuple):
+    rows: list[CveRows]
+    # paths of files of the rows
+    paths: list[str]
+    entries: list[ManifestEntry]
+
+
+async def read_cve_file(file_path: str) -> bytes | None:
+    """Read CVE file and return its content"""
+
+    try:
+        async with aiofiles.open(file_path, 'rb') as f:
+            return await f.read()
+    except Exception:
+        logger.exception(f"Failed to read CVE file {file_path}")
+
+
+class Pipeline:
+    def __init__(
+        self,
+        writer,
+        *,
+        read_workers: int = 64,
+        parse_workers: int = 1,
+        write_workers: int = 4,
+        queue_size: int = 1000,
+        batch_size: int = 5000,
+        parse_batch_size: int = 200,
+        store_documents: bool = False,
+        executor: Executor | None = None,
+        manifest: Manifest | None = None,
+        rejects: Rejects | None = None,
+        metrics: Metrics | None = None,
+        on_progress: Callable[[dict[str, int], bool], None] | None = None,
+    ):
+        self.writer = writer
+        self.manifest = manifest
+        self.rejects = rejects
+        self.metrics = metrics or Metrics()
+        # called with counters instead of logging progress, e.g. by a worker of the coordinator
+        self.on_progress = on_progress
+        self.executor = executor
+        self.read_workers = read_workers
+        self.parse_workers = parse_workers
+        self.write_workers = write_workers
+        self.batch_size = batch_size
+        self.parse_batch_size = parse_batch_size
+        # original JSON of files is passed to the writer with their rows
+        self.store_documents = store_documents
+
+        self.paths = asyncio.Queue(maxsize=queue_size)
+        self.contents = asyncio.Queue(maxsize=queue_size)
+        # every batch holds up to batch_size files
+        self.batches = asyncio.Queue(maxsize=write_workers)
+
+        # total number of files is known when all files are found
+        self.scan_done = False
+        self.started_at = time.perf_counter()
+
+    @property
+    def files_count(self) -> int:
+        return self.metrics.counters['files_saved']
+
+    @property
+    def rows_count(self) -> int:
+        return self.metrics.counters['rows_saved']
+
+    @property
+    def skipped_count(self) -> int:
+        return self.metrics.counters['files_skipped']
+
+    @property
+    def rejected_count(self) -> int:
+        return self.metrics.counters['files_rejected']
+
+    def reject(self, file_path: str, stage: str, reason: str):
+        logger.error(f'Rejected CVE file {file_path} at {stage} stage: {reason}')
+        self.metrics.increment('files_rejected')
+        if self.rejects is not None:
+            self.rejects.add(file_path, stage, reason)
+
+    def queue_depths(self) -> dict[str, int]:
+        return {
+            'paths': self.paths.qsize(),
+            'contents': self.contents.qsize(),
+            'batches': self.batches.qsize(),
+        }
+
+    async def scan(self, scanned_files: AsyncIterable[ScannedFile]):
+        async for scanned_file in scanned_files:
+            self.metrics.increment('files_found')
+            await self.paths.put(scanned_file)
+        self.scan_done = True
+
+    async def read(self):
+        while (scanned_file := await self.paths.get()) is not DONE:
+            file_path, size, mtime_ns = scanned_file
+            if self.manifest is not None:
+                if size is None:
+                    try:
+                        stat = await aiofiles.os.stat(file_path)
+                    except OSError as error:
+                        self.reject(file_path, 'read', str(error))
+                        continue
+                    size, mtime_ns = stat.st_size, stat.st_mtime_ns
+                if self.manifest.is_unchanged(file_path, size, mtime_ns):
+                    self.metrics.increment('files_skipped')
+                    continue
+
+            with self.metrics.timer('read'):
+                content = await read_cve_file(file_path)
+            if content is None:
+                self.reject(file_path, 'read', 'failed to read file')
+                continue
+            self.metrics.increment('bytes_read', len(content))
+            await self.contents.put(CveFile(file_path, size, mtime_ns, content))
+
+    async def feed(self, cve_files: AsyncIterable[CveFile]):
+        """Put already read files (e.g. members of an archive) into the pipeline"""
+
+        async for cve_file in cve_files:
+            self.metrics.increment('files_found')
+            if self.manifest is not None and self.manifest.is_unchanged(
+                cve_file.path, cve_file.size, cve_file.mtime_ns
+            ):
+                self.metrics.increment('files_skipped')
+                continue
+            self.metrics.increment('bytes_read', len(cve_file.content))
+            await self.contents.put(cve_file)
+        self.scan_done = True
+
+    def is_not_updated(self, cve_file: CveFile, date_updated: str | None) -> bool:
+        """File was modified, but CVE record has the same `dateUpdated` as before"""
+
+        if self.manifest is None or date_updated is None:
+            return False
+        entry = self.manifest.get(cve_file.path)
+        return entry is not None and entry.date_updated == date_updated
+
+    async def parse_contents(self, contents: list[bytes]) -> ParsedBatch:
+        if self.executor is None:
+            return parse_cve_files(contents, self.store_documents)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, parse_cve_files, contents, self.store_documents)
+
+    async def parse(self):
+        batch = Batch([], [], [])
+        done = False
+        while not done:
+            cve_files = []
+            while len(cve_files) < self.parse_batch_size:
+                cve_file = await self.contents.get()
+                if cve_file is DONE:
+                    done = True
+                    break
+                cve_files.append(cve_file)
+            if not cve_files:
+                continue
+
+            parsed_batch = await self.parse_contents([cve_file.content for cve_file in cve_files])
+            self.metrics.observe('decode', parsed_batch.decode_seconds)
+            self.metrics.observe('build_rows', parsed_batch.build_seconds)
+            for cve_file, parsed_cve in zip(cve_files, parsed_batch.parsed_cves):
+                if isinstance(parsed_cve, Rejected):
+                    self.reject(cve_file.path, parsed_cve.stage, parsed_cve.reason)
+                    continue
+                self.metrics.increment('values_truncated', parsed_cve.truncated)
+
+                batch.entries.append(
+                    ManifestEntry(cve_file.path, cve_file.size, cve_file.mtime_ns, parsed_cve.date_updated)
+                )
+                if self.is_not_updated(cve_file, parsed_cve.date_updated):
+                    self.metrics.increment('files_skipped')
+                else:
+                    batch.rows.append(parsed_cve.rows)
+                    batch.paths.append(cve_file.path)
+
+                if len(batch.entries) >= self.batch_size:
+                    await self.batches.put(batch)
+                    batch = Batch([], [], [])
+
+        if batch.entries:
+            await self.batches.put(batch)
+
+    async def write_rows(self, paths: list[str], rows: list[CveRows], rejected: set[str]) -> int:
+        """Save rows, bisect the batch if the database rejects its data"""
+
+        try:
+            return await self.writer.write(rows)
+        except DB_ERRORS as error:
+            if not is_data_error(error):
+                raise
+            if len(rows) == 1:
+                self.reject(paths[0], 'write', f'{type(error).__name__}: {error}')
+                rejected.add(paths[0])
+                return 0
+            logger.warning(f'Batch of {len(rows)} files was rejected by database, bisecting: {error}')
+            self.metrics.increment('batches_bisected')
+
+        middle = len(rows) // 2
+        return (
+            await self.write_rows(paths[:middle], rows[:middle], rejected)
+            + await self.write_rows(paths[middle:], rows[middle:], rejected)
+        )
+
+    async def write(self):
+        while (batch := await self.batches.get()) is not DONE:
+            rejected = set()
+            if batch.rows:
+                rows_count = await self.write_rows(batch.paths, batch.rows, rejected)
+                self.metrics.increment('rows_saved', rows_count)
+                self.metrics.increment('files_saved', len(batch.rows) - len(rejected))
+            # checkpoint: files of the batch are saved, rejected files are loaded again next time
+            if self.manifest is not None:
+                with self.metrics.timer('checkpoint'):
+                    self.manifest.record(entry for entry in batch.entries if entry.path not in rejected)
+
+    def progress(self) -> str:
+        elapsed = time.perf_counter() - self.started_at
+        depths = ', '.join(f'{name}={size}' for name, size in self.queue_depths().items())
+        return f'{format_progress(self.metrics.counters, self.scan_done, elapsed)} | queues: {depths}'
+
+    async def monitor(self, interval: float):
+        """Periodically log progress and queue depths to see which stage is the bottleneck"""
+
+        while True:
+            await asyncio.sleep(interval)
+            self.metrics.sample_queues(self.queue_depths())
+            if self.on_progress is not None:
+                self.on_progress(dict(self.metrics.counters), self.scan_done)
+            else:
+                logger.info(self.progress())
+
+    async def _run_stage(self, workers: list, next_queue: asyncio.Queue | None, next_workers: int):
+        """Wait for all workers of the stage and then stop workers of the next stage"""
+
+        async with asyncio.TaskGroup() as tg:
+            for worker in workers:
+                tg.create_task(worker)
+
+        if next_queue is not None:
+            for _ in range(next_workers):
+                await next_queue.put(DONE)
+
+    async def run(
+        self,
+        scanned_files: AsyncIterable[ScannedFile] | None = None,
+        *,
+        cve_files: AsyncIterable[CveFile] | None = None,
+        monitor_interval: float = 5.0,
+    ):
+        """Process files found by a scanner, or files which are already read"""
+
+        if cve_files is not None:
+            stages = [
+                ([self.feed(cve_files)], self.contents, self.parse_workers),
+            ]
+        else:
+            stages = [
+                ([self.scan(scanned_files)], self.paths, self.read_workers),
+                ([self.read() for _ in range(self.read_workers)], self.contents, self.parse_workers),
+            ]
+        stages += [
+            ([self.parse() for _ in range(self.parse_workers)], self.batches, self.write_workers),
+            ([self.write() for _ in range(self.write_workers)], None, 0),
+        ]
+
+        self.started_at = time.perf_counter()
+        monitor_task = asyncio.create_task(self.monitor(monitor_interval))
+        try:
+            async with asyncio.TaskGroup() as tg:
+                for workers, next_queue, next_workers in stages:
+                    tg.create_task(self._run_stage(workers, next_queue, next_workers))
+        finally:
+            monitor_task.cancel()
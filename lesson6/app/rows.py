@@ -0,0 +1,79 @@
+"""Plain tuple representation of CVE records used by the bulk writers"""
+
+from datetime import date, datetime
+from typing import NamedTuple
+
+
+CVE_COLUMNS = (
+    'id',
+    'state',
+    'assigner_org_id',
+    'assigner_short_name',
+    'date_reserved',
+    'date_published',
+    'date_updated',
+)
+CONTAINER_COLUMNS = (
+    'cve_record_id',
+    'title',
+    'description',
+    'date_assigned',
+    'date_public',
+)
+DOCUMENT_COLUMNS = (
+    'cve_id',
+    'document',
+)
+
+
+class CveRows(NamedTuple):
+    cve: tuple
+    cna: list[tuple]
+    adp: list[tuple]
+    # original JSON of the file, only when documents are stored
+    document: str | None = None
+
+
+def parse_date(value: str | None) -> date | None:
+    if value:
+        return datetime.fromisoformat(value).date()
+    return None
+
+
+def make_container_row(data: dict, cve_id: str) -> tuple:
+    descriptions = data.get('descriptions')
+    return (
+        cve_id,
+        data.get('title'),
+        descriptions[0].get('value') if descriptions else "null",
+        parse_date(data.get('dateAssigned')),
+        parse_date(data.get('datePublic')),
+    )
+
+
+def make_rows(json_data: dict) -> CveRows:
+    """Convert CVE JSON document into rows for cves/cna_containers/adp_containers"""
+
+    metadata = json_data['cveMetadata']
+    cve_id = metadata['cveId']
+    cve_row = (
+        cve_id,
+        metadata['state'],
+        metadata['assignerOrgId'],
+        metadata.get('assignerShortName'),
+        parse_date(metadata.get('dateReserved')),
+        parse_date(metadata.get('datePublished')),
+        parse_date(metadata.get('dateUpdated')),
+    )
+
+    containers = json_data.get('containers', {})
+    cna_rows = []
+    if cna_container_data := containers.get('cna'):
+        cna_rows.append(make_container_row(cna_container_data, cve_id))
+
+    adp_rows = [
+        make_container_row(adp_data, cve_id)
+        for adp_data in containers.get('adp', [])
+    ]
+
+    return CveRows(cve_row, cna_rows, adp_rows)
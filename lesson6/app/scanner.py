@@ -0,0 +1,109 @@
+"""Streaming scanner of CVE directory: cves/<year>/<bucket>/CVE-*.json
+
+Year directories are walked concurrently in a thread pool and paths are
+yielded as soon as they are found. A shard selects a part of the tree,
+so several loader processes can split it without overlap.
+"""
+
+import os
+import zlib
+from contextlib import aclosing
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import AsyncIterator, Callable, NamedTuple
+
+from app.utils import iterate_in_threads
+
+
+# number of paths sent from a scanning thread to the event loop at once
+CHUNK_SIZE = 100
+
+
+class ScannedFile(NamedTuple):
+    path: str
+    size: int | None = None
+    mtime_ns: int | None = None
+
+
+class Shard(NamedTuple):
+    index: int
+    count: int
+    # 'hash' - by CRC32 of file name, 'year' - by year directory
+    by: str = 'hash'
+
+    @classmethod
+    def parse(cls, value: str, by: str = 'hash') -> "Shard":
+        """Make shard from a string like '0/4'"""
+
+        index, count = (int(part) for part in value.split('/'))
+        if not 0 <= index < count:
+            raise ValueError(f"Invalid shard {value}: index should be in range [0, {count})")
+        return cls(index, count, by)
+
+    def has_year(self, year: str) -> bool:
+        if self.by != 'year':
+            return True
+        return int(year) % self.count == self.index
+
+    def has_file(self, file_name: str) -> bool:
+        if self.by != 'hash':
+            return True
+        return zlib.crc32(file_name.encode()) % self.count == self.index
+
+
+def walk_year(
+    year_path: str,
+    put: Callable[[list], None],
+    with_stat: bool,
+    shard: Shard | None,
+):
+    """Walk buckets of the year directory and pass found files to `put` in chunks"""
+
+    chunk = []
+    for code_entry in os.scandir(year_path):
+        if not code_entry.is_dir(follow_symlinks=True):
+            continue
+        for cve_entry in os.scandir(code_entry.path):
+            if shard is not None and not shard.has_file(cve_entry.name):
+                continue
+            if with_stat:
+                stat = cve_entry.stat()
+                chunk.append(ScannedFile(cve_entry.path, stat.st_size, stat.st_mtime_ns))
+            else:
+                chunk.append(ScannedFile(cve_entry.path))
+
+            if len(chunk) >= CHUNK_SIZE:
+                put(chunk)
+                chunk = []
+    if chunk:
+        put(chunk)
+
+
+async def scan_cve_files(
+    path: str,
+    *,
+    with_stat: bool = False,
+    shard: Shard | None = None,
+    workers: int = 8,
+    queue_size: int = 100,
+) -> AsyncIterator[ScannedFile]:
+    """Yields CVE files while year directories are being walked"""
+
+    year_paths = [
+        year_entry.path
+        for year_entry in os.scandir(path)
+        if year_entry.is_dir(follow_symlinks=False)
+        and (shard is None or shard.has_year(year_entry.name))
+    ]
+
+    producers = [
+        partial(walk_year, year_path, with_stat=with_stat, shard=shard)
+        for year_path in year_paths
+    ]
+    # chunks are closed before the executor: closing stops the scanning threads,
+    # otherwise the executor would wait for them blocked in put() forever
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='cve-scanner') as executor:
+        async with aclosing(iterate_in_threads(producers, executor, queue_size)) as chunks:
+            async for chunk in chunks:
+                for scanned_file in chunk:
+                    yield scanned_file
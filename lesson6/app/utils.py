@@ -1,27 +1,151 @@
 import argparse
+import asyncio
 import os
+import threading
+from concurrent.futures import Executor
+from typing import AsyncIterator, Callable
 
 
-def get_path_from_args() -> str:
-    """Read path to a folder with CVE files."""
+def get_args() -> argparse.Namespace:
+    """Read path to a folder with CVE files and loader options."""
     parser = argparse.ArgumentParser(
         prog='lesson6',
         description='path to CVEs directory.'
     )
     parser.add_argument('--path_to_cves', default="./cvelistV5/cves/", required=False)
+    parser.add_argument(
+        '--archive',
+        default=None,
+        help='cvelistV5 release archive (zip or tar.gz) to read CVE files from instead of --path_to_cves',
+    )
+    parser.add_argument(
+        '--writer',
+        choices=['orm', 'core', 'copy'],
+        default='orm',
+        help=(
+            'orm - session.add_all + commit, core - Core insert executemany of plain rows, '
+            'copy - asyncpg binary COPY into staging tables'
+        ),
+    )
+    parser.add_argument('--scan-workers', type=int, default=8, help='threads walking year directories')
+    parser.add_argument('--shard', default=None, help='part of CVE tree to load, e.g. 0/4')
+    parser.add_argument(
+        '--shard-by',
+        choices=['hash', 'year'],
+        default='hash',
+        help='hash - by CRC32 of file name, year - by year directory',
+    )
+    parser.add_argument('--read-workers', type=int, default=64, help='concurrent file reads')
+    parser.add_argument(
+        '--parse-processes',
+        type=int,
+        default=os.cpu_count(),
+        help='processes decoding JSON, 0 - decode in the event loop',
+    )
+    parser.add_argument(
+        '--parse-workers',
+        type=int,
+        default=os.cpu_count(),
+        help='batches of files being decoded concurrently',
+    )
+    parser.add_argument('--parse-batch-size', type=int, default=200, help='files sent to a parse process at once')
+    parser.add_argument('--write-workers', type=int, default=4, help='concurrent DB writes')
+    parser.add_argument('--queue-size', type=int, default=1000, help='capacity of paths/contents queues')
+    parser.add_argument('--batch-size', type=int, default=5000, help='files saved per DB transaction')
+    parser.add_argument(
+        '--store-documents',
+        action='store_true',
+        help='also save original JSON of every file into cve_documents table',
+    )
+    parser.add_argument('--monitor-interval', type=float, default=5.0, help='seconds between queue depth logs')
+    parser.add_argument(
+        '--incremental',
+        action='store_true',
+        help='save only new and changed files (upsert), skip files recorded in the manifest',
+    )
+    parser.add_argument('--manifest', default='./cve_manifest.sqlite3', help='path to the manifest file')
+    parser.add_argument(
+        '--rejects',
+        default='./cve_rejects.ndjson',
+        help='NDJSON file to append CVE files which were not saved, with the reason',
+    )
+    parser.add_argument(
+        '--processes',
+        type=int,
+        default=1,
+        help='worker processes, each loads its own shard of CVE tree',
+    )
+    parser.add_argument(
+        '--max-connections',
+        type=int,
+        default=10,
+        help='DB connections of all worker processes together',
+    )
+    parser.add_argument(
+        '--bulk-load',
+        action='store_true',
+        help='drop secondary indexes and foreign keys during a full load and rebuild them afterwards',
+    )
+    parser.add_argument(
+        '--bulk-load-restore',
+        default='./bulk_load_restore.sql',
+        help='file with statements restoring dropped indexes and foreign keys',
+    )
+    parser.add_argument('--report', default=None, help='path to save JSON report of the run')
     args = parser.parse_args()
-    return args.path_to_cves
+    if args.bulk_load and args.incremental:
+        # upserts delete old containers by cve_record_id, they need the indexes
+        parser.error('--bulk-load is meant for a full load and can not be used with --incremental')
+    return args
+
 
+class ProducerStopped(Exception):
+    pass
 
-def get_cve_filenames(path: str) -> list:
-    """Returns list of paths of CVE files."""
+
+async def iterate_in_threads(
+    producers: list[Callable[[Callable[[list], None]], None]],
+    executor: Executor | None = None,
+    queue_size: int = 100,
+) -> AsyncIterator[list]:
+    """Run blocking producers in threads and yield chunks they put.
+    
+    Every producer is called with a `put(chunk)` function, which blocks
+    the thread while the queue is full (backpressure).
+    """
+    
+    loop = asyncio.get_running_loop()
+    chunks = asyncio.Queue(maxsize=queue_size)
+    stop = threading.Event()
+    
+    def put(chunk: list):
+        future = asyncio.run_coroutine_threadsafe(chunks.put(chunk), loop)
+        while True:
+            try:
+                return future.result(timeout=0.5)
+            except TimeoutError:
+                if stop.is_set():
+                    future.cancel()
+                    raise ProducerStopped()
     
-    files_list = []
-    for year_entry in os.scandir(path):
-        if year_entry.is_dir(follow_symlinks=False):
-            for code_entry in os.scandir(year_entry.path):
-                if code_entry.is_dir(follow_symlinks=True):
-                    for cve_entry in os.scandir(code_entry.path):
-                        files_list.append(cve_entry.path)
+    def run(producer):
+        try:
+            producer(put)
+        except ProducerStopped:
+            pass
     
-    return files_list
+    all_done = asyncio.gather(*[
+        loop.run_in_executor(executor, run, producer) for producer in producers
+    ])
+    try:
+        while not (all_done.done() and chunks.empty()):
+            get_chunk = asyncio.ensure_future(chunks.get())
+            await asyncio.wait([get_chunk, all_done], return_when=asyncio.FIRST_COMPLETED)
+            if not get_chunk.done():
+                get_chunk.cancel()
+                continue
+            yield get_chunk.result()
+        # raise errors of the producers
+        await all_done
+    finally:
+        stop.set()
@@ -0,0 +1,89 @@
+"""Validation and normalisation of CVE rows before they are written.
+
+Values longer than their columns are truncated, rows which can't be saved
+at all raise InvalidCve and go to the rejects file instead of failing the
+whole batch.
+"""
+
+import json
+import re
+import uuid
+from datetime import datetime, timezone
+
+from app.rows import CveRows
+
+
+CVE_ID_RE = re.compile(r'^CVE-[0-9]{4}-[0-9]{4,19}$')
+STATES = {'PUBLISHED', 'RESERVED', 'REJECTED'}
+
+# lengths of String columns in app/models.py
+ASSIGNER_SHORT_NAME_LENGTH = 32
+TITLE_LENGTH = 256
+DESCRIPTION_LENGTH = 4096
+
+
+class InvalidCve(ValueError):
+    pass
+
+
+def truncate(value: str | None, length: int) -> tuple[str | None, bool]:
+    if value is not None and len(value) > length:
+        return value[:length], True
+    return value, False
+
+
+def normalise_container(row: tuple) -> tuple[tuple, int]:
+    cve_record_id, title, description, date_assigned, date_public = row
+    title, title_truncated = truncate(title, TITLE_LENGTH)
+    description, description_truncated = truncate(description, DESCRIPTION_LENGTH)
+    row = (cve_record_id, title, description, date_assigned, date_public)
+    return row, title_truncated + description_truncated
+
+
+def normalise_rows(rows: CveRows) -> tuple[CveRows, int]:
+    """Returns rows which fit the tables and the number of truncated values"""
+
+    cve_id, state, assigner_org_id, assigner_short_name, *dates = rows.cve
+    if not isinstance(cve_id, str) or not CVE_ID_RE.match(cve_id):
+        raise InvalidCve(f'invalid CVE id {cve_id!r}')
+    if state not in STATES:
+        raise InvalidCve(f'invalid state {state!r}')
+    try:
+        uuid.UUID(assigner_org_id)
+    except (TypeError, ValueError, AttributeError):
+        raise InvalidCve(f'invalid assignerOrgId {assigner_org_id!r}')
+
+    assigner_short_name, truncated = truncate(assigner_short_name, ASSIGNER_SHORT_NAME_LENGTH)
+    cve_row = (cve_id, state, assigner_org_id, assigner_short_name, *dates)
+
+    cna_rows = []
+    for row in rows.cna:
+        row, row_truncated = normalise_container(row)
+        cna_rows.append(row)
+        truncated += row_truncated
+    adp_rows = []
+    for row in rows.adp:
+        row, row_truncated = normalise_container(row)
+        adp_rows.append(row)
+        truncated += row_truncated
+
+    return CveRows(cve_row, cna_rows, adp_rows), truncated
+
+
+class Rejects:
+    """NDJSON file with CVE files which were not saved, and the reason why"""
+
+    def __init__(self, path: str):
+        # several loader processes may append to the same file, every line is one write
+        self.file = open(path, 'a', buffering=1)
+
+    def add(self, file_path: str, stage: str, reason: str):
+        self.file.write(json.dumps({
+            'path': file_path,
+            'stage': stage,
+            'reason': reason,
+            'rejected_at': datetime.now(timezone.utc).isoformat(),
+        }) + '\n')
+
+    def close(self):
+        self.file.close()
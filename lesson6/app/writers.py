@@ -0,0 +1,300 @@
+"""Backends which save parsed CVE files into database"""
+
+import asyncpg
+from sqlalchemy import Text, bindparam, cast, delete, exc
+from sqlalchemy.dialects.postgresql import JSONB, insert
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.db import make_session
+from app.metrics import Metrics
+from app.models import CVERecord, CnaContainer, AdpContainer, CveDocument
+from app.rows import CVE_COLUMNS, CONTAINER_COLUMNS, DOCUMENT_COLUMNS, CveRows
+
+
+def make_insert_documents(upsert: bool):
+    """Insert of original JSON documents, they are sent as text and cast to jsonb by Postgres"""
+
+    statement = insert(CveDocument.__table__).values(
+        cve_id=bindparam('cve_id'),
+        document=cast(bindparam('document', type_=Text), JSONB),
+    )
+    if upsert:
+        statement = statement.on_conflict_do_update(
+            index_elements=['cve_id'],
+            set_={'document': statement.excluded.document},
+        )
+    return statement
+
+
+def make_document_values(rows: list[CveRows]) -> list[dict]:
+    return [
+        {'cve_id': record_rows.cve[0], 'document': record_rows.document}
+        for record_rows in rows if record_rows.document is not None
+    ]
+
+
+class OrmWriter:
+    """Build ORM objects and save them with a session (unit of work).
+
+    With upsert=True, existing CVE records and their containers are deleted
+    in the same transaction before saving, so they are replaced atomically.
+    """
+
+    def __init__(self, engine: AsyncEngine, upsert: bool = False, metrics: Metrics | None = None):
+        self.engine = engine
+        self.upsert = upsert
+        self.metrics = metrics or Metrics()
+        self.insert_documents = make_insert_documents(upsert)
+
+    async def write(self, rows: list[CveRows]) -> int:
+        cve_records = []
+        cna_containers = []
+        adp_containers = []
+        with self.metrics.timer('build_objects'):
+            for cve_rows in rows:
+                cve_records.append(CVERecord(**dict(zip(CVE_COLUMNS, cve_rows.cve))))
+                for cna_row in cve_rows.cna:
+                    cna_containers.append(CnaContainer(**dict(zip(CONTAINER_COLUMNS, cna_row))))
+                for adp_row in cve_rows.adp:
+                    adp_containers.append(AdpContainer(**dict(zip(CONTAINER_COLUMNS, adp_row))))
+            document_values = make_document_values(rows)
+
+        async with make_session(self.engine) as session:
+            with self.metrics.timer('db_write'):
+                if self.upsert:
+                    cve_ids = [cve_record.id for cve_record in cve_records]
+                    await session.execute(delete(CnaContainer).where(CnaContainer.cve_record_id.in_(cve_ids)))
+                    await session.execute(delete(AdpContainer).where(AdpContainer.cve_record_id.in_(cve_ids)))
+                    await session.execute(delete(CVERecord).where(CVERecord.id.in_(cve_ids)))
+                session.add_all(cve_records)
+                session.add_all(cna_containers)
+                session.add_all(adp_containers)
+                await session.flush()
+                if document_values:
+                    await session.execute(self.insert_documents, document_values)
+            with self.metrics.timer('commit'):
+                await session.commit()
+
+        return len(cve_records) + len(cna_containers) + len(adp_containers) + len(document_values)
+
+
+STAGING_TABLES_SQL = """
+CREATE TEMP TABLE cves_staging (
+    id text,
+    state text,
+    assigner_org_id uuid,
+    assigner_short_name text,
+    date_reserved date,
+    date_published date,
+    date_updated date
+) ON COMMIT DROP;
+CREATE TEMP TABLE cna_containers_staging (
+    cve_record_id text,
+    title text,
+    description text,
+    date_assigned date,
+    date_public date
+) ON COMMIT DROP;
+CREATE TEMP TABLE adp_containers_staging (LIKE cna_containers_staging) ON COMMIT DROP;
+CREATE TEMP TABLE cve_documents_staging (
+    cve_id text,
+    document jsonb
+) ON COMMIT DROP;
+"""
+
+# foreign keys are checked at the end of the statement,
+# so parents and children can be inserted by the same statement
+MERGE_SQL = """
+WITH new_cves AS (
+    INSERT INTO cves (id, state, assigner_org_id, assigner_short_name,
+                      date_reserved, date_published, date_updated)
+    SELECT id, state::cvestate, assigner_org_id, assigner_short_name,
+           date_reserved, date_published, date_updated
+    FROM cves_staging
+), new_cna_containers AS (
+    INSERT INTO cna_containers (cve_record_id, title, description, date_assigned, date_public)
+    SELECT cve_record_id, title, description, date_assigned, date_public
+    FROM cna_containers_staging
+)
+INSERT INTO adp_containers (cve_record_id, title, description, date_assigned, date_public)
+SELECT cve_record_id, title, description, date_assigned, date_public
+FROM adp_containers_staging
+"""
+
+# all parts of the statement see the same snapshot: containers are deleted
+# only if they existed before, and new containers are inserted after that
+UPSERT_SQL = """
+WITH upserted_cves AS (
+    INSERT INTO cves (id, state, assigner_org_id, assigner_short_name,
+                      date_reserved, date_published, date_updated)
+    SELECT id, state::cvestate, assigner_org_id, assigner_short_name,
+           date_reserved, date_published, date_updated
+    FROM cves_staging
+    ON CONFLICT (id) DO UPDATE SET
+        state = EXCLUDED.state,
+        assigner_org_id = EXCLUDED.assigner_org_id,
+        assigner_short_name = EXCLUDED.assigner_short_name,
+        date_reserved = EXCLUDED.date_reserved,
+        date_published = EXCLUDED.date_published,
+        date_updated = EXCLUDED.date_updated
+), deleted_cna_containers AS (
+    DELETE FROM cna_containers WHERE cve_record_id IN (SELECT id FROM cves_staging)
+), deleted_adp_containers AS (
+    DELETE FROM adp_containers WHERE cve_record_id IN (SELECT id FROM cves_staging)
+), new_cna_containers AS (
+    INSERT INTO cna_containers (cve_record_id, title, description, date_assigned, date_public)
+    SELECT cve_record_id, title, description, date_assigned, date_public
+    FROM cna_containers_staging
+)
+INSERT INTO adp_containers (cve_record_id, title, description, date_assigned, date_public)
+SELECT cve_record_id, title, description, date_assigned, date_public
+FROM adp_containers_staging
+"""
+
+# executed only when documents are stored, cve_documents may not exist otherwise
+MERGE_DOCUMENTS_SQL = """
+INSERT INTO cve_documents (cve_id, document)
+SELECT cve_id, document
+FROM cve_documents_staging
+"""
+UPSERT_DOCUMENTS_SQL = MERGE_DOCUMENTS_SQL + """
+ON CONFLICT (cve_id) DO UPDATE SET document = EXCLUDED.document
+"""
+
+
+class CopyWriter:
+    """Stream rows into staging tables with binary COPY and merge them in one statement"""
+
+    def __init__(self, engine: AsyncEngine, upsert: bool = False, metrics: Metrics | None = None):
+        self.engine = engine
+        self.merge_sql = UPSERT_SQL if upsert else MERGE_SQL
+        self.merge_documents_sql = UPSERT_DOCUMENTS_SQL if upsert else MERGE_DOCUMENTS_SQL
+        self.metrics = metrics or Metrics()
+
+    async def write(self, rows: list[CveRows]) -> int:
+        cve_rows = []
+        cna_rows = []
+        adp_rows = []
+        document_rows = []
+        with self.metrics.timer('build_objects'):
+            for record_rows in rows:
+                cve_rows.append(record_rows.cve)
+                cna_rows.extend(record_rows.cna)
+                adp_rows.extend(record_rows.adp)
+                if record_rows.document is not None:
+                    document_rows.append((record_rows.cve[0], record_rows.document))
+
+        async with self.engine.connect() as conn:
+            raw_connection = await conn.get_raw_connection()
+            # asyncpg connection under the SQLAlchemy adapter
+            driver_connection = raw_connection.driver_connection
+            transaction = driver_connection.transaction()
+            await transaction.start()
+            try:
+                with self.metrics.timer('db_write'):
+                    await driver_connection.execute(STAGING_TABLES_SQL)
+                    await driver_connection.copy_records_to_table(
+                        'cves_staging', records=cve_rows, columns=CVE_COLUMNS
+                    )
+                    await driver_connection.copy_records_to_table(
+                        'cna_containers_staging', records=cna_rows, columns=CONTAINER_COLUMNS
+                    )
+                    await driver_connection.copy_records_to_table(
+                        'adp_containers_staging', records=adp_rows, columns=CONTAINER_COLUMNS
+                    )
+                    await driver_connection.execute(self.merge_sql)
+                    if document_rows:
+                        await driver_connection.copy_records_to_table(
+                            'cve_documents_staging', records=document_rows, columns=DOCUMENT_COLUMNS
+                        )
+                        await driver_connection.execute(self.merge_documents_sql)
+            except BaseException:
+                await transaction.rollback()
+                raise
+            with self.metrics.timer('commit'):
+                await transaction.commit()
+
+        return len(cve_rows) + len(cna_rows) + len(adp_rows) + len(document_rows)
+
+
+class CoreWriter:
+    """Insert plain rows with Core executemany, without ORM instances and unit of work"""
+
+    def __init__(self, engine: AsyncEngine, upsert: bool = False, metrics: Metrics | None = None):
+        self.engine = engine
+        self.upsert = upsert
+        self.metrics = metrics or Metrics()
+
+        cves = CVERecord.__table__
+        self.insert_cves = insert(cves)
+        if upsert:
+            self.insert_cves = self.insert_cves.on_conflict_do_update(
+                index_elements=[cves.c.id],
+                set_={column: self.insert_cves.excluded[column] for column in CVE_COLUMNS[1:]},
+            )
+        self.insert_documents = make_insert_documents(upsert)
+
+    async def write(self, rows: list[CveRows]) -> int:
+        with self.metrics.timer('build_objects'):
+            cve_values = [dict(zip(CVE_COLUMNS, record_rows.cve)) for record_rows in rows]
+            cna_values = [
+                dict(zip(CONTAINER_COLUMNS, cna_row))
+                for record_rows in rows for cna_row in record_rows.cna
+            ]
+            adp_values = [
+                dict(zip(CONTAINER_COLUMNS, adp_row))
+                for record_rows in rows for adp_row in record_rows.adp
+            ]
+            document_values = make_document_values(rows)
+
+        async with self.engine.connect() as conn:
+            with self.metrics.timer('db_write'):
+                await conn.execute(self.insert_cves, cve_values)
+                if self.upsert:
+                    cve_ids = [values['id'] for values in cve_values]
+                    await conn.execute(delete(CnaContainer).where(CnaContainer.cve_record_id.in_(cve_ids)))
+                    await conn.execute(delete(AdpContainer).where(AdpContainer.cve_record_id.in_(cve_ids)))
+                if cna_values:
+                    await conn.execute(insert(CnaContainer.__table__), cna_values)
+                if adp_values:
+                    await conn.execute(insert(AdpContainer.__table__), adp_values)
+                if document_values:
+                    await conn.execute(self.insert_documents, document_values)
+            with self.metrics.timer('commit'):
+                await conn.commit()
+
+        return len(cve_values) + len(cna_values) + len(adp_values) + len(document_values)
+
+
+# errors of the database: raised by SQLAlchemy writers and by asyncpg COPY
+DB_ERRORS = (exc.DBAPIError, asyncpg.exceptions.PostgresError)
+# SQLSTATE classes of errors caused by the data of a batch (not by the connection or the server):
+# data exception and integrity constraint violation, another attempt with a part of the batch may succeed
+DATA_ERROR_CLASSES = ('22', '23')
+
+
+def get_sqlstate(error: BaseException) -> str | None:
+    """SQLSTATE of asyncpg error, also when it is wrapped by SQLAlchemy.
+
+    SQLAlchemy translates only some asyncpg errors into its own classes
+    (e.g. IntegrityError), data exceptions become a plain DBAPIError,
+    so errors are told apart by SQLSTATE instead of their classes.
+    """
+
+    orig = getattr(error, 'orig', None)
+    for candidate in (error, orig, error.__cause__, getattr(orig, '__cause__', None)):
+        if sqlstate := getattr(candidate, 'sqlstate', None):
+            return sqlstate
+    return None
+
+
+def is_data_error(error: BaseException) -> bool:
+    sqlstate = get_sqlstate(error)
+    return sqlstate is not None and sqlstate[:2] in DATA_ERROR_CLASSES
+
+
+WRITERS = {
+    'orm': OrmWriter,
+    'core': CoreWriter,
+    'copy': CopyWriter,
+}
@@ -0,0 +1,79 @@
+"""Compare memory and speed of ORM instances (make_from_json) and plain rows for a chunk of CVE files.
+
+Usage:
+    python -m bench.compare_rows --chunk-size 5000
+"""
+
+import argparse
+import gc
+import random
+import time
+import tracemalloc
+
+from app.models import CVERecord, CnaContainer, AdpContainer
+from app.rows import make_rows
+from bench.generate_corpus import make_cve
+
+
+def build_orm_objects(documents: list[dict]) -> list:
+    """The path used before plain rows: ORM instances wired through relationships"""
+
+    result = []
+    for json_data in documents:
+        cve_record = CVERecord.make_from_json(json_data['cveMetadata'])
+        result.append(cve_record)
+        if cna_container_data := json_data.get('containers', {}).get('cna'):
+            result.append(CnaContainer.make_from_json(cna_container_data, cve_record))
+        for adp_data in json_data.get('containers', {}).get('adp', []):
+            result.append(AdpContainer.make_from_json(adp_data, cve_record))
+    return result
+
+
+def build_rows(documents: list[dict]) -> list:
+    return [make_rows(json_data) for json_data in documents]
+
+
+def measure(build, documents: list[dict], repeat: int) -> dict:
+    gc.collect()
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    result = build(documents)
+    retained = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+
+    rows_count = len(result) if build is build_orm_objects else sum(
+        1 + len(rows.cna) + len(rows.adp) for rows in result
+    )
+    del result
+
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        build(documents)
+        timings.append(time.perf_counter() - start)
+    best = min(timings)
+
+    return {
+        'rows': rows_count,
+        'memory_mb': round(retained / 2 ** 20, 2),
+        'seconds': round(best, 4),
+        'rows_per_second': round(rows_count / best),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Compare ORM instances and plain rows.')
+    parser.add_argument('--chunk-size', type=int, default=5000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    rnd = random.Random(42)
+    documents = [make_cve(rnd, f'CVE-2024-{1000 + i}', 2024) for i in range(args.chunk_size)]
+
+    for name, build in [('make_from_json', build_orm_objects), ('rows', build_rows)]:
+        result = measure(build, documents, args.repeat)
+        print(
+            f"{name:>15}: {result['rows']} rows, {result['memory_mb']} MB per chunk, "
+            f"{result['rows_per_second']} rows/s"
+        )
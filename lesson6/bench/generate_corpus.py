@@ -0,0 +1,160 @@
+"""Generate synthetic CVE JSON files in the cvelistV5 layout: cves/<year>/<bucket>/CVE-*.json
+
+Usage:
+    python -m bench.generate_corpus --count 10000 --output ./synthetic/cves
+"""
+
+import argparse
+import json
+import os
+import random
+from datetime import datetime, timedelta
+
+
+ASSIGNERS = [
+    ('mitre', 'aef0c9a6-8d0b-4a2a-9c33-4b7f06a0c7a1'),
+    ('GitHub_M', 'a0819718-46f1-4df5-94e2-005712e83aaa'),
+    ('Wordfence', 'b15e7b5b-3da4-40ae-a43c-f7aa60e62599'),
+    ('VulDB', '1af790b2-7ee1-4545-860a-a788eba489b5'),
+    ('redhat', '53f830b8-0a3f-465b-8143-3b8a9948e749'),
+    ('microsoft', 'f38d906d-7342-40ea-92c1-6c4a2c6478c8'),
+    ('patchstack', '21595511-bba5-4825-b968-b78d1f9984a3'),
+    ('Linux', '416baaa9-dc9f-4396-8d5f-8c081fb06d67'),
+]
+ADP_PROVIDERS = [
+    ('CISA ADP Vulnrichment', 'CISA-ADP', '134c704f-9b21-4f2e-91b3-4a467353bcc0'),
+    ('CVE Program Container', 'CVE', 'af854a3a-2127-422b-91ae-364da2661108'),
+]
+WORDS = (
+    'vulnerability allows remote attackers execute arbitrary code via crafted request '
+    'buffer overflow in the function parser when handling malformed input could lead '
+    'to denial of service information disclosure privilege escalation authentication '
+    'bypass cross-site scripting SQL injection plugin WordPress kernel driver memory '
+    'corruption use-after-free improper validation of user supplied data affected versions '
+    'prior to through component module endpoint administrator session token'
+).split()
+
+
+def make_text(rnd: random.Random, length: int) -> str:
+    words = []
+    size = 0
+    while size < length:
+        word = rnd.choice(WORDS)
+        words.append(word)
+        size += len(word) + 1
+    return ' '.join(words)[:length].capitalize() + '.'
+
+
+def make_date(rnd: random.Random, year: int) -> datetime:
+    return datetime(year, 1, 1) + timedelta(seconds=rnd.randrange(365 * 24 * 3600))
+
+
+def iso(value: datetime) -> str:
+    return value.strftime('%Y-%m-%dT%H:%M:%S.000Z')
+
+
+def make_cve(rnd: random.Random, cve_id: str, year: int) -> dict:
+    assigner_short_name, assigner_org_id = rnd.choice(ASSIGNERS)
+    date_reserved = make_date(rnd, year)
+    date_published = date_reserved + timedelta(days=rnd.randrange(1, 120))
+    date_updated = date_published + timedelta(days=rnd.randrange(0, 365))
+    provider_metadata = {
+        'orgId': assigner_org_id,
+        'shortName': assigner_short_name,
+        'dateUpdated': iso(date_updated),
+    }
+
+    state = 'REJECTED' if rnd.random() < 0.08 else 'PUBLISHED'
+    cve_metadata = {
+        'cveId': cve_id,
+        'assignerOrgId': assigner_org_id,
+        'state': state,
+        'assignerShortName': assigner_short_name,
+        'dateReserved': iso(date_reserved),
+        'dateUpdated': iso(date_updated),
+    }
+    if state == 'REJECTED':
+        cve_metadata['dateRejected'] = iso(date_published)
+        cna = {
+            'providerMetadata': provider_metadata,
+            'rejectedReasons': [{'lang': 'en', 'value': 'This candidate was withdrawn by its CNA.'}],
+        }
+        return {
+            'dataType': 'CVE_RECORD',
+            'dataVersion': '5.1',
+            'cveMetadata': cve_metadata,
+            'containers': {'cna': cna},
+        }
+
+    cve_metadata['datePublished'] = iso(date_published)
+    # descriptions of real CVEs: most are a few hundred chars, some are much longer
+    description_length = min(4000, int(rnd.lognormvariate(5.5, 0.7)))
+    product = make_text(rnd, rnd.randrange(8, 30)).rstrip('.')
+    cna = {
+        'providerMetadata': provider_metadata,
+        'title': f'{product} {make_text(rnd, rnd.randrange(20, 100))}',
+        'descriptions': [{'lang': 'en', 'value': make_text(rnd, description_length)}],
+        'affected': [{
+            'vendor': assigner_short_name,
+            'product': product,
+            'versions': [{'version': f'{rnd.randrange(1, 10)}.{rnd.randrange(0, 20)}', 'status': 'affected'}],
+        }],
+        'problemTypes': [{
+            'descriptions': [{'lang': 'en', 'type': 'CWE', 'cweId': f'CWE-{rnd.randrange(20, 1000)}'}],
+        }],
+        'references': [
+            {'url': f'https://example.com/advisories/{cve_id}/{i}'}
+            for i in range(rnd.randrange(1, 6))
+        ],
+    }
+    if rnd.random() < 0.5:
+        cna['dateAssigned'] = iso(date_reserved)
+        cna['datePublic'] = iso(date_published)
+
+    containers = {'cna': cna}
+    adp = []
+    for title, short_name, org_id in ADP_PROVIDERS:
+        if rnd.random() < 0.4:
+            adp.append({
+                'title': title,
+                'providerMetadata': {'orgId': org_id, 'shortName': short_name, 'dateUpdated': iso(date_updated)},
+                'references': [{'url': f'https://example.com/{short_name}/{cve_id}', 'tags': ['x_transferred']}],
+            })
+    if adp:
+        containers['adp'] = adp
+
+    return {
+        'dataType': 'CVE_RECORD',
+        'dataVersion': '5.1',
+        'cveMetadata': cve_metadata,
+        'containers': containers,
+    }
+
+
+def generate(count: int, output: str, seed: int, years: range):
+    rnd = random.Random(seed)
+    per_year = -(-count // len(years))
+    created = 0
+    for year in years:
+        for number in range(1000, 1000 + per_year):
+            if created >= count:
+                return
+            cve_id = f'CVE-{year}-{number}'
+            bucket_path = os.path.join(output, str(year), f'{number // 1000}xxx')
+            os.makedirs(bucket_path, exist_ok=True)
+            with open(os.path.join(bucket_path, f'{cve_id}.json'), 'w') as f:
+                json.dump(make_cve(rnd, cve_id, year), f, indent=2)
+            created += 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Generate synthetic CVE files.')
+    parser.add_argument('--count', type=int, default=10000)
+    parser.add_argument('--output', default='./synthetic/cves')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--first-year', type=int, default=1999)
+    parser.add_argument('--last-year', type=int, default=datetime.now().year)
+    args = parser.parse_args()
+
+    generate(args.count, args.output, args.seed, range(args.first_year, args.last_year + 1))
+    print(f'Generated {args.count} CVE files in {args.output}')
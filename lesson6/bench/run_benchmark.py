@@ -0,0 +1,98 @@
+"""Run main.py against a local Postgres and save ingest metrics as JSON.
+
+Every run starts from empty tables. Usage:
+    python -m bench.generate_corpus --count 10000 --output ./synthetic/cves
+    python -m bench.run_benchmark --path_to_cves ./synthetic/cves --writer orm --writer copy
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from sqlalchemy import text
+
+from app.db import get_engine
+
+
+async def truncate_tables():
+    engine = get_engine()
+    async with engine.begin() as conn:
+        tables = 'cves, cna_containers, adp_containers'
+        # documents saved by a previous run with --store-documents would conflict with the next one
+        if await conn.scalar(text("SELECT to_regclass('cve_documents') IS NOT NULL")):
+            tables += ', cve_documents'
+        await conn.execute(text(f"TRUNCATE {tables}"))
+    await engine.dispose()
+
+
+def run_loader(writer: str, path_to_cves: str, extra_args: list[str]) -> dict:
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        report_path = os.path.join(tmp_dir, 'report.json')
+        command = [
+            sys.executable, 'main.py',
+            '--path_to_cves', path_to_cves,
+            '--writer', writer,
+            '--report', report_path,
+            *extra_args,
+        ]
+        start = time.perf_counter()
+        process = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        # rusage of this run only (the loader and its parse processes)
+        _, status, rusage = os.wait4(process.pid, 0)
+        wall_seconds = time.perf_counter() - start
+        process.returncode = os.waitstatus_to_exitcode(status)
+        if process.returncode != 0:
+            raise RuntimeError(f"Loader failed: {' '.join(command)}")
+
+        with open(report_path) as f:
+            report = json.load(f)
+
+    # ru_maxrss is in kilobytes on Linux: peak RSS of the largest process
+    peak_rss_mb = rusage.ru_maxrss / 1024
+    return {
+        'writer': writer,
+        'args': extra_args,
+        'files': report['files'],
+        'rows': report['rows'],
+        'wall_seconds': round(wall_seconds, 3),
+        'files_per_second': round(report['files'] / report['total_seconds'], 1),
+        'rows_per_second': round(report['rows'] / report['total_seconds'], 1),
+        'peak_rss_mb': round(peak_rss_mb, 1),
+        'stages': report['stages'],
+        'average_queue_depths': report['average_queue_depths'],
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description='Benchmark CVE loader.')
+    parser.add_argument('--path_to_cves', default='./synthetic/cves')
+    parser.add_argument('--writer', action='append', choices=['orm', 'core', 'copy'])
+    parser.add_argument('--repeat', type=int, default=1, help='runs per writer')
+    parser.add_argument('--output', default=None, help='JSON file for results')
+    args, extra_args = parser.parse_known_args()
+
+    results = []
+    for writer in args.writer or ['orm', 'core', 'copy']:
+        for _ in range(args.repeat):
+            await truncate_tables()
+            result = run_loader(writer, args.path_to_cves, extra_args)
+            print(
+                f"{writer}: {result['files_per_second']} files/s, {result['rows_per_second']} rows/s, "
+                f"peak RSS {result['peak_rss_mb']} MB"
+            )
+            results.append(result)
+
+    output = args.output or f"bench_results_{datetime.now():%Y%m%d_%H%M%S}.json"
+    with open(output, 'w') as f:
+        json.dump({'path_to_cves': args.path_to_cves, 'results': results}, f, indent=2)
+    print(f'Results saved into {output}')
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
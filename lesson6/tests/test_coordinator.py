@@ -0,0 +1,16 @@
+from types import SimpleNamespace
+
+from app.coordinator import find_dead_workers
+
+
+def test_killed_workers_are_found():
+    workers = [
+        SimpleNamespace(exitcode=None),
+        SimpleNamespace(exitcode=-9),
+        SimpleNamespace(exitcode=0),
+        SimpleNamespace(exitcode=1),
+    ]
+
+    assert find_dead_workers(workers, set()) == [(1, -9), (3, 1)]
+    # workers which sent a result or a failure are not reported again
+    assert find_dead_workers(workers, {3}) == [(1, -9)]
@@ -0,0 +1,87 @@
+from app.metrics import BUCKETS, Histogram, Metrics, format_duration, format_progress
+
+
+def make_worker_metrics(depths: list[int]) -> Metrics:
+    metrics = Metrics()
+    for depth in depths:
+        metrics.sample_queues({'rows': depth})
+    return metrics
+
+
+def test_merged_queue_depth_is_average_of_all_samples():
+    metrics = Metrics()
+    metrics.merge(make_worker_metrics([10, 10, 10, 10]))
+    metrics.merge(make_worker_metrics([2, 2, 2, 2]))
+
+    assert metrics.queue_samples == 8
+    assert metrics.report()['average_queue_depths'] == {'rows': 6.0}
+
+
+def test_merge_adds_counters_and_stages():
+    first, second = Metrics(), Metrics()
+    first.increment('rows_saved', 3)
+    first.observe('db_write', 0.5)
+    second.increment('rows_saved', 4)
+    second.observe('db_write', 1.5)
+
+    metrics = Metrics()
+    metrics.merge(first)
+    metrics.merge(second)
+
+    assert metrics.counters['rows_saved'] == 7
+    assert metrics.stages['db_write'].count == 2
+    assert metrics.stages['db_write'].max == 1.5
+
+
+def test_percentile_is_upper_bound_of_its_bucket():
+    histogram = Histogram()
+    for _ in range(90):
+        histogram.observe(0.00005)
+    for _ in range(10):
+        histogram.observe(0.003)
+
+    assert histogram.percentile(0.5) == BUCKETS[0]
+    assert histogram.percentile(0.9) == BUCKETS[0]
+    # 0.003 is in the bucket up to 0.0032, capped by the largest observed value
+    assert histogram.percentile(0.95) == 0.003
+    assert histogram.report()['count'] == 100
+    assert histogram.report()['max_seconds'] == 0.003
+
+
+def test_values_above_the_last_bucket():
+    histogram = Histogram()
+    histogram.observe(0.001)
+    histogram.observe(500.0)
+
+    assert histogram.counts[-1] == 1
+    assert histogram.percentile(0.99) == 500.0
+
+
+def test_empty_histogram():
+    histogram = Histogram()
+
+    assert histogram.percentile(0.5) == 0
+    assert histogram.report()['mean_seconds'] == 0
+
+
+def test_merged_histogram_has_samples_of_both():
+    first, second = Histogram(), Histogram()
+    first.observe(0.0001)
+    second.observe(0.0002)
+    second.observe(0.0004)
+
+    first.merge(second)
+
+    assert first.count == 3
+    assert first.percentile(1.0) == 0.0004
+    assert round(first.total, 6) == 0.0007
+
+
+def test_progress_line():
+    counters = {'files_found': 200, 'files_saved': 90, 'files_skipped': 10, 'rows_saved': 300}
+
+    assert format_progress(counters, True, 10) == (
+        'progress: 100/200 files (50.0%), 10 files/s, 300 rows, 0.0 MB read, ETA 0m10s'
+    )
+    assert 'ETA unknown (scanning)' in format_progress(counters, False, 10)
+    assert format_duration(3725) == '1h02m05s'
@@ -0,0 +1,62 @@
+import asyncio
+
+import pytest
+
+from app.scanner import Shard, scan_cve_files
+
+
+def make_tree(root) -> set[str]:
+    paths = set()
+    for year in ('2022', '2023', '2024'):
+        for number in range(1000, 1030):
+            bucket = root / year / f'{str(number)[0]}xxx'
+            bucket.mkdir(parents=True, exist_ok=True)
+            path = bucket / f'CVE-{year}-{number}.json'
+            path.write_text('{}')
+            paths.add(str(path))
+    return paths
+
+
+async def scan(path: str, shard: Shard | None = None, **kwargs) -> list:
+    return [scanned_file async for scanned_file in scan_cve_files(path, shard=shard, **kwargs)]
+
+
+def test_parse():
+    assert Shard.parse('1/4') == Shard(1, 4, 'hash')
+    assert Shard.parse('0/2', by='year') == Shard(0, 2, 'year')
+    for value in ('4/4', '-1/4', '1', 'a/b'):
+        with pytest.raises(ValueError):
+            Shard.parse(value)
+
+
+def test_shard_selects_by_year_or_by_file():
+    by_year = Shard(1, 2, 'year')
+    assert by_year.has_year('2023') and not by_year.has_year('2024')
+    assert by_year.has_file('CVE-2024-1000.json')
+
+    by_hash = Shard(0, 2, 'hash')
+    assert by_hash.has_year('2024')
+    assert by_hash.has_file('CVE-2024-1000.json') != Shard(1, 2).has_file('CVE-2024-1000.json')
+
+
+@pytest.mark.parametrize('by', ['hash', 'year'])
+def test_shards_split_the_tree_without_overlap(tmp_path, by):
+    paths = make_tree(tmp_path)
+
+    shards = [
+        {scanned_file.path for scanned_file in asyncio.run(scan(str(tmp_path), Shard(index, 3, by)))}
+        for index in range(3)
+    ]
+
+    assert set.union(*shards) == paths
+    assert sum(len(shard) for shard in shards) == len(paths)
+    assert all(shards)
+
+
+def test_scan_with_stat(tmp_path):
+    paths = make_tree(tmp_path)
+
+    scanned_files = asyncio.run(scan(str(tmp_path), with_stat=True, workers=2, queue_size=1))
+
+    assert {scanned_file.path for scanned_file in scanned_files} == paths
+    assert all(scanned_file.size == 2 and scanned_file.mtime_ns for scanned_file in scanned_files)
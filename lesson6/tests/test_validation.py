@@ -0,0 +1,64 @@
+import json
+
+import pytest
+
+from app.rows import CveRows
+from app.validation import (
+    DESCRIPTION_LENGTH, TITLE_LENGTH, InvalidCve, Rejects, normalise_rows, truncate,
+)
+
+
+ORG_ID = '8254265b-2729-46b6-b9e3-3dfca2d5bfca'
+
+
+def make_rows(cve_id='CVE-2024-1000', state='PUBLISHED', org_id=ORG_ID, short_name='mitre', cna=(), adp=()):
+    return CveRows((cve_id, state, org_id, short_name, None, None, None), list(cna), list(adp))
+
+
+def test_truncate():
+    assert truncate('abcdef', 3) == ('abc', True)
+    assert truncate('abc', 3) == ('abc', False)
+    assert truncate(None, 3) == (None, False)
+
+
+def test_long_values_are_truncated_and_counted():
+    cna = ('CVE-2024-1000', 't' * (TITLE_LENGTH + 1), 'd' * (DESCRIPTION_LENGTH + 1), None, None)
+    adp = ('CVE-2024-1000', 'title', 'description', None, None)
+
+    rows, truncated = normalise_rows(make_rows(short_name='s' * 40, cna=[cna], adp=[adp]))
+
+    assert truncated == 3
+    assert rows.cve[3] == 's' * 32
+    assert rows.cna == [('CVE-2024-1000', 't' * TITLE_LENGTH, 'd' * DESCRIPTION_LENGTH, None, None)]
+    assert rows.adp == [adp]
+
+
+def test_valid_rows_are_kept():
+    rows = make_rows(cna=[('CVE-2024-1000', 'title', 'description', None, None)])
+    assert normalise_rows(rows) == (rows, 0)
+
+
+@pytest.mark.parametrize('values, message', [
+    ({'cve_id': 'CVE-24-1000'}, 'invalid CVE id'),
+    ({'cve_id': None}, 'invalid CVE id'),
+    ({'state': 'DRAFT'}, 'invalid state'),
+    ({'org_id': 'mitre'}, 'invalid assignerOrgId'),
+    ({'org_id': None}, 'invalid assignerOrgId'),
+])
+def test_invalid_rows_are_rejected(values, message):
+    with pytest.raises(InvalidCve, match=message):
+        normalise_rows(make_rows(**values))
+
+
+def test_rejects_are_appended_as_lines(tmp_path):
+    path = tmp_path / 'rejects.ndjson'
+    for _ in range(2):
+        rejects = Rejects(str(path))
+        rejects.add('cves/2024/1xxx/CVE-2024-1000.json', 'validate', "invalid state 'DRAFT'")
+        rejects.close()
+
+    lines = [json.loads(line) for line in path.read_text().splitlines()]
+    assert len(lines) == 2
+    assert lines[0]['path'] == 'cves/2024/1xxx/CVE-2024-1000.json'
+    assert lines[0]['stage'] == 'validate'
+    assert lines[0]['reason'] == "invalid state 'DRAFT'"
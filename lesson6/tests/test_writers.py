@@ -0,0 +1,94 @@
+import asyncio
+
+import asyncpg
+import pytest
+from sqlalchemy import exc
+from sqlalchemy.dialects.postgresql.asyncpg import AsyncAdapt_asyncpg_connection, AsyncAdapt_asyncpg_dbapi
+
+from app.pipeline import Pipeline
+from app.rows import CveRows
+from app.writers import get_sqlstate, is_data_error
+
+
+DBAPI = AsyncAdapt_asyncpg_dbapi(asyncpg)
+
+
+def translate(error: Exception) -> exc.DBAPIError:
+    """The error as it is raised by SQLAlchemy writers with asyncpg driver"""
+
+    try:
+        AsyncAdapt_asyncpg_connection._handle_exception_no_connection(DBAPI, error)
+    except Exception as orig:
+        return exc.DBAPIError.instance('INSERT INTO cves ...', {}, orig, DBAPI.Error)
+
+
+@pytest.mark.parametrize('error', [
+    asyncpg.exceptions.CharacterNotInRepertoireError('invalid byte sequence for encoding "UTF8": 0x00'),
+    asyncpg.exceptions.StringDataRightTruncationError('value too long for type character varying(32)'),
+    asyncpg.exceptions.InvalidTextRepresentationError('invalid input value for enum cvestate'),
+    asyncpg.exceptions.UniqueViolationError('duplicate key value violates unique constraint "cves_pkey"'),
+])
+def test_data_errors_translated_by_sqlalchemy(error):
+    translated = translate(error)
+    assert get_sqlstate(translated) == error.sqlstate
+    assert is_data_error(translated)
+
+
+def test_data_exception_is_not_translated_into_data_error():
+    # the reason to classify errors by SQLSTATE
+    translated = translate(asyncpg.exceptions.CharacterNotInRepertoireError('0x00'))
+    assert not isinstance(translated, (exc.DataError, exc.IntegrityError))
+
+
+def test_errors_of_copy_writer_are_not_wrapped():
+    assert is_data_error(asyncpg.exceptions.UniqueViolationError('duplicate key'))
+
+
+@pytest.mark.parametrize('error', [
+    asyncpg.exceptions.ConnectionDoesNotExistError('connection was closed'),
+    asyncpg.exceptions.TooManyConnectionsError('sorry, too many clients already'),
+    ConnectionRefusedError('connection refused'),
+])
+def test_other_errors_are_not_data_errors(error):
+    assert not is_data_error(translate(error))
+
+
+class FailingWriter:
+    """Rejects batches with files from `bad`, like the database rejects a bad row"""
+
+    def __init__(self, bad: set[str], error: Exception):
+        self.bad = bad
+        self.error = error
+        self.written = []
+
+    async def write(self, rows: list[CveRows]) -> int:
+        if any(record_rows.cve[0] in self.bad for record_rows in rows):
+            raise self.error
+        self.written.extend(record_rows.cve[0] for record_rows in rows)
+        return len(rows)
+
+
+def make_rows(cve_ids: list[str]) -> list[CveRows]:
+    return [CveRows((cve_id,), [], []) for cve_id in cve_ids]
+
+
+def test_batch_with_bad_row_is_bisected():
+    cve_ids = [f'CVE-2024-{index}' for index in range(10)]
+    writer = FailingWriter({'CVE-2024-3'}, translate(asyncpg.exceptions.CharacterNotInRepertoireError('0x00')))
+    pipeline = Pipeline(writer)
+    rejected = set()
+
+    saved = asyncio.run(pipeline.write_rows(cve_ids, make_rows(cve_ids), rejected))
+
+    assert saved == 9
+    assert rejected == {'CVE-2024-3'}
+    assert sorted(writer.written) == sorted(set(cve_ids) - {'CVE-2024-3'})
+    assert pipeline.metrics.counters['files_rejected'] == 1
+
+
+def test_batch_is_not_bisected_on_connection_error():
+    cve_ids = ['CVE-2024-1', 'CVE-2024-2']
+    writer = FailingWriter({'CVE-2024-1'}, translate(asyncpg.exceptions.ConnectionDoesNotExistError('closed')))
+
+    with pytest.raises(exc.DBAPIError):
+        asyncio.run(Pipeline(writer).write_rows(cve_ids, make_rows(cve_ids), set()))
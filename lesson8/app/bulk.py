@@ -0,0 +1,128 @@
+"""Bulk create of CVE records from an NDJSON stream.
+
+The request body is read chunk by chunk and validated line by line;
+valid records are inserted in batches, one transaction and one
+executemany per table for every batch.
+"""
+
+import json
+from typing import AsyncIterator, NamedTuple
+
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import CVERecord, CnaContainer, AdpContainer
+from app.schemas import CreateCVERecordSchema
+
+
+BATCH_SIZE = 1000
+MAX_LINE_BYTES = 1024 * 1024
+# SQLSTATE classes of errors caused by the data of a batch: data exception and integrity
+# constraint violation, other errors (e.g. a lost connection) fail the request
+DATA_ERROR_CLASSES = ('22', '23')
+
+
+class LineResult(NamedTuple):
+    line: int
+    cve_id: str | None = None
+    error: str | None = None
+
+    def to_ndjson(self) -> bytes:
+        if self.error is not None:
+            return json.dumps({"line": self.line, "error": self.error}).encode() + b"\n"
+        return json.dumps({"line": self.line, "id": self.cve_id}).encode() + b"\n"
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes | None]:
+    """Lines of the stream, None for a line longer than MAX_LINE_BYTES"""
+
+    buffer = b""
+    too_long = False
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if too_long:
+                # the end of a skipped line
+                too_long = False
+                continue
+            yield line if len(line) <= MAX_LINE_BYTES else None
+        if not too_long and len(buffer) > MAX_LINE_BYTES:
+            too_long = True
+            yield None
+        if too_long:
+            buffer = b""
+    if buffer and not too_long:
+        yield buffer
+
+
+def format_validation_error(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in details['loc']) or 'record'}: {details['msg']}"
+        for details in error.errors(include_url=False)
+    )
+
+
+def make_values(records: list[CreateCVERecordSchema]) -> tuple[list[str], list[dict], list[dict], list[dict]]:
+    cve_ids = []
+    cve_values = []
+    cna_values = []
+    adp_values = []
+    for record in records:
+        cve_id = CVERecord.generate_id()
+        cve_record_data = record.model_dump()
+        cna_container_data = cve_record_data.pop('cna_container')
+        adp_containers_data = cve_record_data.pop('adp_containers')
+
+        cve_ids.append(cve_id)
+        cve_values.append({**cve_record_data, 'id': cve_id})
+        if cna_container_data:
+            cna_values.append({**cna_container_data, 'cve_record_id': cve_id})
+        adp_values.extend({**adp_cont, 'cve_record_id': cve_id} for adp_cont in adp_containers_data)
+    return cve_ids, cve_values, cna_values, adp_values
+
+
+def is_data_error(error: DBAPIError) -> bool:
+    """Error caused by the data of a batch.
+
+    SQLAlchemy translates only some asyncpg errors into its own classes, data
+    exceptions (e.g. a NUL character in a string) become a plain DBAPIError,
+    so errors are told apart by SQLSTATE of asyncpg error.
+    """
+
+    for candidate in (error.orig, getattr(error.orig, '__cause__', None)):
+        if sqlstate := getattr(candidate, 'sqlstate', None):
+            return sqlstate[:2] in DATA_ERROR_CLASSES
+    return False
+
+
+async def insert_batch(session: AsyncSession, records: list[CreateCVERecordSchema]) -> list[str]:
+    cve_ids, cve_values, cna_values, adp_values = make_values(records)
+    await session.execute(insert(CVERecord), cve_values)
+    if cna_values:
+        await session.execute(insert(CnaContainer), cna_values)
+    if adp_values:
+        await session.execute(insert(AdpContainer), adp_values)
+    await session.commit()
+    return cve_ids
+
+
+async def insert_records(
+    session: AsyncSession,
+    records: list[tuple[int, CreateCVERecordSchema]],
+) -> list[LineResult]:
+    """Insert a batch, if database rejects its data split it in halves until bad records are found"""
+
+    try:
+        cve_ids = await insert_batch(session, [record for _, record in records])
+    except DBAPIError as error:
+        await session.rollback()
+        if not is_data_error(error):
+            raise
+        if len(records) == 1:
+            return [LineResult(records[0][0], error=str(error.orig))]
+        middle = len(records) // 2
+        return await insert_records(session, records[:middle]) + await insert_records(session, records[middle:])
+    return [LineResult(line, cve_id) for (line, _), cve_id in zip(records, cve_ids)]
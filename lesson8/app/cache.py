@@ -0,0 +1,82 @@
+"""In-process LRU cache with TTL for serialized responses.
+
+Every app process has its own cache, writes of other processes are seen
+after TTL at the latest.
+"""
+
+import hashlib
+import time
+from collections import OrderedDict
+from typing import NamedTuple
+
+
+class CachedResponse(NamedTuple):
+    body: bytes
+    etag: str
+    expires_at: float
+
+
+def make_etag(body: bytes) -> str:
+    return f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = [tag.strip().removeprefix('W/') for tag in if_none_match.split(',')]
+    return '*' in tags or etag in tags
+
+
+class ResponseCache:
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.entries: OrderedDict[str, CachedResponse] = OrderedDict()
+        # changed by every invalidation, see `set`
+        self.generation = 0
+        self.counters = {'hits': 0, 'misses': 0, 'evictions': 0, 'expirations': 0, 'invalidations': 0}
+
+    def get(self, key: str) -> CachedResponse | None:
+        entry = self.entries.get(key)
+        if entry is not None and entry.expires_at <= time.monotonic():
+            del self.entries[key]
+            self.counters['expirations'] += 1
+            entry = None
+        if entry is None:
+            self.counters['misses'] += 1
+            return None
+        self.entries.move_to_end(key)
+        self.counters['hits'] += 1
+        return entry
+
+    def set(self, key: str, body: bytes, generation: int) -> CachedResponse:
+        """Cache the body read from database when the cache was at `generation`.
+
+        If anything was invalidated while the body was being read, it may be
+        stale already, so it is returned but not cached.
+        """
+
+        entry = CachedResponse(body, make_etag(body), time.monotonic() + self.ttl)
+        if generation != self.generation or self.max_size <= 0:
+            return entry
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+            self.counters['evictions'] += 1
+        return entry
+
+    def invalidate(self, key: str):
+        self.generation += 1
+        if self.entries.pop(key, None) is not None:
+            self.counters['invalidations'] += 1
+
+    def stats(self) -> dict:
+        requests = self.counters['hits'] + self.counters['misses']
+        return {
+            **self.counters,
+            'size': len(self.entries),
+            'max_size': self.max_size,
+            'ttl_seconds': self.ttl,
+            'hit_ratio': round(self.counters['hits'] / requests, 3) if requests else 0,
+        }
@@ -2,6 +2,8 @@ import os
 
 from dotenv import load_dotenv
 
+from app.constants import CountStrategy
+
 load_dotenv(override=True)
 
 POSTGRES_HOST = os.getenv("POSTGRES_HOST", "localhost")
@@ -12,3 +14,22 @@ POSTGRES_DB = os.getenv("POSTGRES_DB")
 
 DB_URI = f"postgresql+asyncpg://{POSTGRES_USERNAME}:{POSTGRES_PASSWORD}@{POSTGRES_HOST}:{POSTGRES_PORT}/{POSTGRES_DB}"
 DB_ECHO = os.environ.get("DB_ECHO", "false").lower() == "true"
+
+# connection pool of the API, created once for the lifetime of the app
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", 10))
+DB_MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW", 10))
+DB_POOL_PRE_PING = os.environ.get("DB_POOL_PRE_PING", "true").lower() == "true"
+# prepared statements cached per connection, 0 disables the cache (e.g. behind pgbouncer)
+DB_STATEMENT_CACHE_SIZE = int(os.environ.get("DB_STATEMENT_CACHE_SIZE", 100))
+
+# cache of GET /cves/{cve_id} responses, 0 disables the cache
+CACHE_MAX_SIZE = int(os.environ.get("CACHE_MAX_SIZE", 10000))
+CACHE_TTL_SECONDS = float(os.environ.get("CACHE_TTL_SECONDS", 60))
+
+# encode responses with orjson straight from rows, without Pydantic models (optional)
+FAST_SERIALIZATION = os.environ.get("FAST_SERIALIZATION", "false").lower() == "true"
+
+# total of paginated listings: exact, estimated, cached or none (see app/counting.py)
+# parsed here, so a wrong value fails at startup instead of every request
+COUNT_STRATEGY = CountStrategy(os.environ.get("COUNT_STRATEGY", "exact").lower())
+COUNT_TTL_SECONDS = float(os.environ.get("COUNT_TTL_SECONDS", 60))
@@ -5,3 +5,31 @@ class CveState(enum.Enum):
     PUBLISHED = "PUBLISHED"
     RESERVED = "RESERVED"
     REJECTED = "REJECTED"
+
+
+class CursorOrder(str, enum.Enum):
+    ID = "id"
+    # newest first, records without date_published go after all others
+    DATE_PUBLISHED = "date_published"
+
+
+class SortKey(str, enum.Enum):
+    """Sort keys of CVE list, every one is backed by an index; "-" means descending"""
+    ID = "id"
+    ID_DESC = "-id"
+    DATE_PUBLISHED = "date_published"
+    DATE_PUBLISHED_DESC = "-date_published"
+    DATE_UPDATED = "date_updated"
+    DATE_UPDATED_DESC = "-date_updated"
+
+
+class ExportFormat(str, enum.Enum):
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+
+class CountStrategy(str, enum.Enum):
+    EXACT = "exact"
+    ESTIMATED = "estimated"
+    CACHED = "cached"
+    NONE = "none"
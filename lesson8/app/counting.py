@@ -0,0 +1,131 @@
+"""Totals of paginated listings.
+
+COUNT(*) of a listing scans all its rows on every page request, so the
+strategy of counting is configurable (COUNT_STRATEGY):
+
+- exact: COUNT(*) of filtered listings; the total of the whole table is
+  counted once and then kept up to date by write endpoints of the API,
+- cached: COUNT(*) of every filter is cached for COUNT_TTL_SECONDS,
+  the total of the whole table is kept up to date like with `exact`,
+- estimated: estimates of the planner, `pg_class.reltuples` for the whole
+  table and EXPLAIN row estimate for a filtered listing,
+- none: no total, listings are not counted.
+
+Writes of other processes (other app workers, the lesson6 loader) are not
+seen by the maintained total, so it is counted again after COUNT_TTL_SECONDS.
+"""
+
+import json
+import time
+from collections import OrderedDict
+
+from sqlalchemy import Select, func, select, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.engine import Dialect
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.constants import CountStrategy
+
+
+# key of the unfiltered listing
+TOTAL_KEY = ''
+
+ESTIMATE_TOTAL_SQL = text("SELECT reltuples::bigint FROM pg_class WHERE oid = CAST(:table AS regclass)")
+
+
+class CountCache:
+    def __init__(self, ttl: float, max_size: int = 1000):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.entries: OrderedDict[str, tuple[int, float]] = OrderedDict()
+        # changed by every write, a count started before a write is not cached
+        self.generation = 0
+
+    def get(self, key: str) -> int | None:
+        entry = self.entries.get(key)
+        if entry is None or entry[1] <= time.monotonic():
+            return None
+        self.entries.move_to_end(key)
+        return entry[0]
+
+    def set(self, key: str, total: int, generation: int):
+        if generation != self.generation:
+            return
+        self.entries[key] = (total, time.monotonic() + self.ttl)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    def add_to_total(self, delta: int):
+        """Called by write endpoints after commit with the number of created (deleted) records"""
+
+        self.generation += 1
+        if (entry := self.entries.get(TOTAL_KEY)) is not None:
+            self.entries[TOTAL_KEY] = (entry[0] + delta, entry[1])
+
+
+def make_key(query: Select) -> str:
+    return str(query.compile(dialect=postgresql.dialect(), compile_kwargs={'literal_binds': True}))
+
+
+def compile_for_driver(query: Select, dialect: Dialect) -> tuple[str, tuple]:
+    """SQL of the query with positional parameters processed by their types, for exec_driver_sql()"""
+
+    compiled = query.compile(dialect=dialect, compile_kwargs={'render_postcompile': True})
+    params = compiled.construct_params()
+    parameters = []
+    for name in compiled.positiontup:
+        value = params[name]
+        if (bind := compiled.binds.get(name)) is not None:
+            processor = bind.type.dialect_impl(dialect).bind_processor(dialect)
+            if processor is not None:
+                value = processor(value)
+        parameters.append(value)
+    return compiled.string, tuple(parameters)
+
+
+async def count_exactly(session: AsyncSession, query: Select) -> int:
+    return await session.scalar(select(func.count()).select_from(query.subquery()))
+
+
+async def estimate_count(session: AsyncSession, query: Select) -> int:
+    if query.whereclause is None:
+        total = await session.scalar(ESTIMATE_TOTAL_SQL, {'table': query.get_final_froms()[0].name})
+        # -1 until the table is analyzed for the first time
+        if total is not None and total >= 0:
+            return total
+        return await count_exactly(session, query)
+
+    # values of filters are sent as parameters, text() would take e.g. ':name' in a value for a parameter
+    connection = await session.connection()
+    sql, parameters = compile_for_driver(query, connection.dialect)
+    explain = (await connection.exec_driver_sql(f'EXPLAIN (FORMAT JSON) {sql}', parameters)).scalar()
+    # asyncpg returns json as text
+    if isinstance(explain, str):
+        explain = json.loads(explain)
+    return explain[0]['Plan']['Plan Rows']
+
+
+async def count_rows(
+    session: AsyncSession,
+    query: Select,
+    strategy: CountStrategy,
+    counts: CountCache,
+) -> int | None:
+    """Total number of rows of the listing, None with `none` strategy"""
+
+    query = query.order_by(None)
+    if strategy is CountStrategy.NONE:
+        return None
+    if strategy is CountStrategy.ESTIMATED:
+        return await estimate_count(session, query)
+    if strategy is CountStrategy.EXACT and query.whereclause is not None:
+        return await count_exactly(session, query)
+
+    key = TOTAL_KEY if query.whereclause is None else make_key(query)
+    total = counts.get(key)
+    if total is None:
+        generation = counts.generation
+        total = await count_exactly(session, query)
+        counts.set(key, total, generation)
+    return total
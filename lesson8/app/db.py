@@ -10,11 +10,47 @@ from sqlalchemy.ext.asyncio import (
     async_sessionmaker,
 )
 
-from app.config import DB_URI, DB_ECHO
+from app.config import (
+    DB_URI,
+    DB_ECHO,
+    DB_POOL_SIZE,
+    DB_MAX_OVERFLOW,
+    DB_POOL_PRE_PING,
+    DB_STATEMENT_CACHE_SIZE,
+)
+
+
+def get_engine(**kwargs) -> AsyncEngine:
+    return create_async_engine(DB_URI, echo=DB_ECHO, **kwargs)
+
+
+def get_pooled_engine() -> AsyncEngine:
+    """Engine with a connection pool configured for the API"""
+
+    return get_engine(
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_pre_ping=DB_POOL_PRE_PING,
+        connect_args={
+            # statements prepared by SQLAlchemy and by asyncpg itself
+            "prepared_statement_cache_size": DB_STATEMENT_CACHE_SIZE,
+            "statement_cache_size": DB_STATEMENT_CACHE_SIZE,
+        },
+    )
 
 
-def get_engine() -> AsyncEngine:
-    return create_async_engine(DB_URI, echo=DB_ECHO)
+def get_pool_stats(engine: AsyncEngine) -> dict:
+    pool = engine.pool
+    # overflow() starts at -pool_size and grows with every opened connection
+    opened = pool.size() + pool.overflow()
+    return {
+        "pool_size": pool.size(),
+        "max_overflow": DB_MAX_OVERFLOW,
+        "connections": opened,
+        "checked_out": pool.checkedout(),
+        "idle": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),
+    }
 
 
 @asynccontextmanager
@@ -1,10 +1,21 @@
 from typing import AsyncIterator
 
+from fastapi import Request
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db import make_session, get_engine
+from app.cache import ResponseCache
+from app.counting import CountCache
 
 
-async def get_session() -> AsyncIterator[AsyncSession]:
-    async with make_session(get_engine()) as session:
+async def get_session(request: Request) -> AsyncIterator[AsyncSession]:
+    # engine and session factory are created once in the lifespan of the app
+    async with request.app.state.session_factory() as session:
         yield session
+
+
+def get_cache(request: Request) -> ResponseCache:
+    return request.app.state.cache
+
+
+def get_counts(request: Request) -> CountCache:
+    return request.app.state.counts
@@ -0,0 +1,89 @@
+"""Streaming export of CVE records.
+
+Records are read with a server-side cursor, `EXPORT_BATCH_SIZE` rows at
+a time, and every batch is serialized into one chunk of the response,
+so memory does not depend on the number of exported records.
+"""
+
+import csv
+import io
+import json
+from typing import AsyncIterator
+
+from sqlalchemy import Select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.config import FAST_SERIALIZATION
+from app.constants import ExportFormat
+from app.schemas import GetCVERecordSchema
+from app.serialization import (
+    GET_CVE_RECORD_FIELDS, GET_CVE_RECORD_STRIPPED, cve_record_details_to_dict, dumps_lines, pick,
+)
+
+
+EXPORT_BATCH_SIZE = 1000
+CONTAINER_FIELDS = {'cna_container', 'adp_containers'}
+CSV_COLUMNS = [field for field in GetCVERecordSchema.model_fields if field not in CONTAINER_FIELDS]
+CSV_CONTAINER_COLUMNS = ['cna_title', 'cna_description', 'cna_date_assigned', 'cna_date_public', 'adp_containers']
+
+
+def to_ndjson(records: list, include_containers: bool) -> bytes:
+    if FAST_SERIALIZATION:
+        if include_containers:
+            return dumps_lines(cve_record_details_to_dict(record) for record in records)
+        return dumps_lines(pick(record, GET_CVE_RECORD_FIELDS, GET_CVE_RECORD_STRIPPED) for record in records)
+
+    exclude = None if include_containers else CONTAINER_FIELDS
+    return b''.join(
+        GetCVERecordSchema.model_validate(record, from_attributes=True).model_dump_json(exclude=exclude).encode()
+        + b'\n'
+        for record in records
+    )
+
+
+def to_csv(records: list, include_containers: bool) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for record in records:
+        data = GetCVERecordSchema.model_validate(record, from_attributes=True).model_dump(mode='json')
+        row = [data[column] for column in CSV_COLUMNS]
+        if include_containers:
+            cna_container = data['cna_container'] or {}
+            row += [
+                cna_container.get('title'),
+                cna_container.get('description'),
+                cna_container.get('date_assigned'),
+                cna_container.get('date_public'),
+                # a list in one cell
+                json.dumps(data['adp_containers']),
+            ]
+        writer.writerow(row)
+    return buffer.getvalue().encode()
+
+
+def csv_header(include_containers: bool) -> bytes:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(CSV_COLUMNS + (CSV_CONTAINER_COLUMNS if include_containers else []))
+    return buffer.getvalue().encode()
+
+
+async def export_records(
+    session_factory: async_sessionmaker,
+    query: Select,
+    export_format: ExportFormat,
+    include_containers: bool,
+) -> AsyncIterator[bytes]:
+    # the session of the request is closed when the response starts,
+    # the export holds its own connection until the last record is sent
+    async with session_factory() as session:
+        result = await session.stream(query.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        if include_containers:
+            # CVERecord objects, otherwise plain rows of columns
+            result = result.scalars()
+        if export_format is ExportFormat.CSV:
+            yield csv_header(include_containers)
+        async for records in result.partitions():
+            if export_format is ExportFormat.CSV:
+                yield to_csv(records, include_containers)
+            else:
+                yield to_ndjson(records, include_containers)
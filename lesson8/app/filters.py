@@ -0,0 +1,116 @@
+"""Filters and sorting of CVE list.
+
+Sorted list accepts only combinations backed by indexes (see the migration
+adding composite indexes), so a filtered page never scans the whole table:
+equality filters must be the leading columns of an index, the sort column
+must follow them and range filters must be on the sort column.
+"""
+
+from dataclasses import dataclass
+from datetime import date
+from typing import Annotated
+
+from fastapi import Query
+from sqlalchemy import Select
+
+from app.constants import CveState, SortKey
+from app.models import CVERecord
+
+
+# equality filters followed by the sort column in indexes of `cves`
+INDEXED_SORTS = {
+    # primary key
+    'id': [()],
+    'date_published': [(), ('state',), ('assigner_short_name',)],
+    'date_updated': [(), ('state',)],
+}
+EQUALITY_FILTERS = ('state', 'assigner_short_name')
+# range filters by the column they limit
+RANGE_FILTERS = {
+    'id': ('year',),
+    'date_published': ('date_published_from', 'date_published_to'),
+    'date_updated': ('date_updated_from', 'date_updated_to'),
+}
+
+
+class UnsupportedFilter(ValueError):
+    pass
+
+
+@dataclass
+class CVERecordFilter:
+    state: CveState | None = None
+    assigner_short_name: str | None = None
+    date_published_from: date | None = None
+    date_published_to: date | None = None
+    date_updated_from: date | None = None
+    date_updated_to: date | None = None
+    year: Annotated[int | None, Query(ge=1999, le=2100, description="year of CVE id")] = None
+
+    def filter(self, query: Select) -> Select:
+        if self.state is not None:
+            query = query.where(CVERecord.state == self.state)
+        if self.assigner_short_name is not None:
+            query = query.where(CVERecord.assigner_short_name == self.assigner_short_name)
+        if self.date_published_from is not None:
+            query = query.where(CVERecord.date_published >= self.date_published_from)
+        if self.date_published_to is not None:
+            query = query.where(CVERecord.date_published <= self.date_published_to)
+        if self.date_updated_from is not None:
+            query = query.where(CVERecord.date_updated >= self.date_updated_from)
+        if self.date_updated_to is not None:
+            query = query.where(CVERecord.date_updated <= self.date_updated_to)
+        if self.year is not None:
+            # a range of the primary key instead of LIKE or extracting the year
+            query = query.where(
+                CVERecord.id >= f'CVE-{self.year}-',
+                CVERecord.id < f'CVE-{self.year + 1}-',
+            )
+        return query
+
+
+@dataclass
+class SortedCVERecordFilter(CVERecordFilter):
+    # by default the first sort key served by an index with the filters, id without filters
+    sort_by: SortKey | None = None
+
+    def supports(self, sort_by: SortKey) -> bool:
+        """The filters and the sort key are served by one index"""
+
+        column = sort_by.value.lstrip('-')
+        equal = tuple(name for name in EQUALITY_FILTERS if getattr(self, name) is not None)
+        if equal not in INDEXED_SORTS[column]:
+            return False
+        return all(
+            getattr(self, name) is None
+            for range_column, names in RANGE_FILTERS.items() if range_column != column
+            for name in names
+        )
+
+    def check(self):
+        """Chooses `sort_by` if it wasn't given, raises UnsupportedFilter if no index serves the filters with it"""
+
+        supported = [sort_by for sort_by in SortKey if self.supports(sort_by)]
+        if self.sort_by is None and supported:
+            self.sort_by = supported[0]
+        if self.sort_by in supported:
+            return
+        filters = [
+            name for name in (*EQUALITY_FILTERS, *(name for names in RANGE_FILTERS.values() for name in names))
+            if getattr(self, name) is not None
+        ]
+        if self.sort_by is None or not supported:
+            message = f"filters {', '.join(filters)} can't be combined"
+        else:
+            message = f"sort_by={self.sort_by.value} is not supported with filters {', '.join(filters)}"
+            message += f", supported sort_by: {', '.join(sort_by.value for sort_by in supported)}"
+        raise UnsupportedFilter(message)
+
+    def sort(self, query: Select) -> Select:
+        """Orders by `sort_by` chosen or checked by `check`"""
+
+        descending = self.sort_by.value.startswith('-')
+        column = getattr(CVERecord, self.sort_by.value.lstrip('-'))
+        # id makes the order stable for records with the same date
+        columns = [column, CVERecord.id] if column is not CVERecord.id else [column]
+        return query.order_by(*[column.desc() if descending else column for column in columns])
@@ -1,8 +1,14 @@
 import logging
+from contextlib import asynccontextmanager
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi_pagination import add_pagination
+from sqlalchemy.ext.asyncio import async_sessionmaker
 
+from app.cache import ResponseCache
+from app.config import CACHE_MAX_SIZE, CACHE_TTL_SECONDS, COUNT_TTL_SECONDS
+from app.counting import CountCache
+from app.db import get_pooled_engine, get_pool_stats
 from app.routers import cves
 
 
@@ -11,8 +17,20 @@ logging.getLogger("sqlalchemy.engine").setLevel(logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    # one engine and connection pool for all requests
+    engine = get_pooled_engine()
+    _app.state.engine = engine
+    _app.state.session_factory = async_sessionmaker(engine)
+    _app.state.cache = ResponseCache(CACHE_MAX_SIZE, CACHE_TTL_SECONDS)
+    _app.state.counts = CountCache(COUNT_TTL_SECONDS)
+    yield
+    await engine.dispose()
+
+
 def initialize_app() -> FastAPI:
-    _app = FastAPI(title="CVE CRUD API")
+    _app = FastAPI(title="CVE CRUD API", lifespan=lifespan)
     
     _app.include_router(cves.router)
     
@@ -28,3 +46,12 @@ app = initialize_app()
 @app.get("/healthcheck", tags=['general'])
 def health_check():
     return {"status": "alive"}
+
+
+@app.get("/metrics", tags=['general'])
+def get_metrics(request: Request):
+    """Connections of the pool (checked out by requests, idle, overflow) and counters of the cache"""
+    return {
+        "db_pool": get_pool_stats(request.app.state.engine),
+        "cache": request.app.state.cache.stats(),
+    }
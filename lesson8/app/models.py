@@ -1,12 +1,11 @@
 from datetime import datetime
-from time import time
-import random
+import secrets
 import uuid
 
-from sqlalchemy import String, Enum, Date, ForeignKey, Sequence
+from sqlalchemy import Computed, String, Enum, Date, ForeignKey, Index, Sequence, Text
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 from sqlalchemy.ext.asyncio import AsyncAttrs
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR, UUID
 from sqlalchemy.sql import func
 
 from app.constants import CveState
@@ -14,6 +13,9 @@ from app.constants import CveState
 
 # cve_id_sequence = Sequence('cve_id_sequence', start=1)
 
+# text searched by /cves/search (see app/search.py)
+SEARCH_VECTOR = "to_tsvector('english', coalesce(title, '') || ' ' || coalesce(description, ''))"
+
 
 class Base(AsyncAttrs, DeclarativeBase):
     pass
@@ -21,6 +23,14 @@ class Base(AsyncAttrs, DeclarativeBase):
 
 class CVERecord(Base):
     __tablename__ = "cves"
+    # filter and sort combinations of CVE list (app/filters.py), id keeps the order stable
+    __table_args__ = (
+        Index("ix_cves_date_published_id", "date_published", "id"),
+        Index("ix_cves_date_updated_id", "date_updated", "id"),
+        Index("ix_cves_state_date_published_id", "state", "date_published", "id"),
+        Index("ix_cves_state_date_updated_id", "state", "date_updated", "id"),
+        Index("ix_cves_assigner_short_name_date_published_id", "assigner_short_name", "date_published", "id"),
+    )
 
     id: Mapped[str] = mapped_column(
         String(length=29),
@@ -37,15 +47,15 @@ class CVERecord(Base):
     assigner_short_name: Mapped[str] = mapped_column(String(length=32), nullable=True)
     date_reserved: Mapped[datetime] = mapped_column(Date(), nullable=True)
     date_published: Mapped[datetime] = mapped_column(Date(), nullable=True)
-    date_updated: Mapped[datetime] = mapped_column(
-        Date(), nullable=True, onupdate=func.now()
-    )
+    date_updated: Mapped[datetime] = mapped_column(Date(), nullable=True, onupdate=func.now())
 
+    # containers are loaded only by endpoints which return them, with explicit options;
+    # on delete they are removed by ON DELETE CASCADE of the foreign keys, without loading
     cna_container: Mapped["CnaContainer"] = relationship(
-        back_populates="cve_record", lazy='selectin', cascade="delete"
+        back_populates="cve_record", lazy='raise', cascade="delete", passive_deletes=True
     )
     adp_containers: Mapped[list["AdpContainer"]] = relationship(
-        back_populates="cve_record", lazy='selectin', cascade="all, delete"
+        back_populates="cve_record", lazy='raise', cascade="all, delete", passive_deletes=True
     )
 
     def __repr__(self) -> str:
@@ -56,7 +66,8 @@ class CVERecord(Base):
         """Generate unique CVE id"""
         
         current_year = datetime.now().year
-        random_indetifier = hex(int(time()))[2:] + str(random.randint(1, 1000))
+        # 64 random bits, ids created in the same second (e.g. by bulk create) don't collide
+        random_indetifier = secrets.token_hex(8)
         return f'CVE-{current_year}-fake{random_indetifier}'
     
     @classmethod
@@ -83,17 +94,38 @@ class CVERecord(Base):
         )
 
 
+# columns of CVE records returned by list endpoints, no ORM objects are built for them
+CVE_RECORD_COLUMNS = (
+    CVERecord.id,
+    CVERecord.state,
+    CVERecord.assigner_org_id,
+    CVERecord.assigner_short_name,
+    CVERecord.date_reserved,
+    CVERecord.date_published,
+    CVERecord.date_updated,
+)
+
+
 class CnaContainer(Base):
     __tablename__ = "cna_containers"
+    __table_args__ = (
+        Index("ix_cna_containers_search_vector", "search_vector", postgresql_using="gin"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     title: Mapped[str] = mapped_column(String(length=256), nullable=True)
     description: Mapped[str] = mapped_column(String(length=4096), nullable=False)
     date_assigned: Mapped[datetime] = mapped_column(Date(), nullable=True)
     date_public: Mapped[datetime] = mapped_column(Date(), nullable=True)
+    # generated by Postgres, never loaded with the container
+    search_vector: Mapped[str] = mapped_column(
+        TSVECTOR, Computed(SEARCH_VECTOR, persisted=True), deferred=True
+    )
 
-    cve_record_id: Mapped[str] = mapped_column(ForeignKey("cves.id", ondelete="CASCADE"), nullable=False)
-    cve_record: Mapped["CVERecord"] = relationship(back_populates="cna_container", lazy='selectin')
+    cve_record_id: Mapped[str] = mapped_column(
+        ForeignKey("cves.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+    cve_record: Mapped["CVERecord"] = relationship(back_populates="cna_container", lazy='raise')
     
     def __repr__(self) -> str:
         _title = f'{self.title[:30]}...' if self.title else None
@@ -119,15 +151,24 @@ class CnaContainer(Base):
 
 class AdpContainer(Base):
     __tablename__ = "adp_containers"
+    __table_args__ = (
+        Index("ix_adp_containers_search_vector", "search_vector", postgresql_using="gin"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     title: Mapped[str] = mapped_column(String(length=256), nullable=True)
     description: Mapped[str] = mapped_column(String(length=4096), nullable=True)
     date_assigned: Mapped[datetime] = mapped_column(Date(), nullable=True)
     date_public: Mapped[datetime] = mapped_column(Date(), nullable=True)
+    # generated by Postgres, never loaded with the container
+    search_vector: Mapped[str] = mapped_column(
+        TSVECTOR, Computed(SEARCH_VECTOR, persisted=True), deferred=True
+    )
     
-    cve_record_id: Mapped[str] = mapped_column(ForeignKey("cves.id", ondelete="CASCADE"), nullable=False)
-    cve_record: Mapped["CVERecord"] = relationship(back_populates="adp_containers", lazy='selectin')
+    cve_record_id: Mapped[str] = mapped_column(
+        ForeignKey("cves.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+    cve_record: Mapped["CVERecord"] = relationship(back_populates="adp_containers", lazy='raise')
 
     def __repr__(self) -> str:
         _title = f'{self.title[:30]}...' if self.title else None
@@ -149,3 +190,29 @@ class AdpContainer(Base):
             date_public=date_public,
             cve_record_id=cve_id
         )
+
+
+class CveDocument(Base):
+    """Original JSON of CVE record, compressed with lz4 (see the migration)"""
+
+    __tablename__ = "cve_documents"
+
+    cve_id: Mapped[str] = mapped_column(String(length=29), primary_key=True)
+    document: Mapped[dict] = mapped_column(JSONB, nullable=False)
+    # hot fields are generated from the document by Postgres
+    state: Mapped[str] = mapped_column(
+        Text, Computed("document #>> '{cveMetadata,state}'", persisted=True), index=True
+    )
+    assigner_short_name: Mapped[str] = mapped_column(
+        Text, Computed("document #>> '{cveMetadata,assignerShortName}'", persisted=True), index=True
+    )
+    # ISO 8601 strings sort in the order of dates, cast to date is not immutable
+    date_updated: Mapped[str] = mapped_column(
+        Text, Computed("document #>> '{cveMetadata,dateUpdated}'", persisted=True), index=True
+    )
+    title: Mapped[str] = mapped_column(
+        Text, Computed("document #>> '{containers,cna,title}'", persisted=True)
+    )
+
+    def __repr__(self) -> str:
+        return f"<CveDocument(cve_id={self.cve_id})>"
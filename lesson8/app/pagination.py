@@ -0,0 +1,121 @@
+"""Offset and keyset (cursor) pagination of CVE records.
+
+With keyset pagination a page continues right after the last record of the
+previous page (`WHERE key > last_key ORDER BY key LIMIT n`), so every page
+is a short index range scan, however deep it is. There is no OFFSET and no COUNT.
+"""
+
+import base64
+import binascii
+import json
+from datetime import date
+
+from fastapi_pagination import Params, resolve_params
+from sqlalchemy import Row, Select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import COUNT_STRATEGY
+from app.constants import CursorOrder
+from app.counting import CountCache, count_rows
+from app.models import CVERecord
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def dump_cursor(values: list) -> str:
+    data = json.dumps(values, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(data).decode().rstrip('=')
+
+
+def load_cursor(cursor: str) -> list:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except (binascii.Error, ValueError, TypeError):
+        raise InvalidCursor('invalid cursor')
+    if not isinstance(values, list) or not values:
+        raise InvalidCursor('invalid cursor')
+    return values
+
+
+def encode_cursor(order: CursorOrder, record: Row) -> str:
+    """Opaque cursor pointing right after the record"""
+
+    if order is CursorOrder.ID:
+        key = [record.id]
+    else:
+        date_published = record.date_published.isoformat() if record.date_published else None
+        key = [date_published, record.id]
+    return dump_cursor([order.value, *key])
+
+
+def decode_cursor(order: CursorOrder, cursor: str) -> tuple:
+    cursor_order, *key = load_cursor(cursor)
+    if cursor_order != order.value:
+        raise InvalidCursor(f'cursor was made for order_by={cursor_order}')
+
+    try:
+        if order is CursorOrder.ID:
+            (cve_id,) = key
+            return (str(cve_id),)
+        date_published, cve_id = key
+        return (date.fromisoformat(date_published) if date_published else None, str(cve_id))
+    except (ValueError, TypeError):
+        raise InvalidCursor('invalid cursor')
+
+
+async def fetch_page(
+    session: AsyncSession,
+    query: Select,
+    order: CursorOrder,
+    cursor: str | None,
+    size: int,
+) -> tuple[list[Row], str | None]:
+    """Returns a page of rows of the query (a select of CVERecord columns) and the cursor of the next page"""
+
+    after = decode_cursor(order, cursor) if cursor else None
+    # one extra record tells if there is a next page
+    limit = size + 1
+
+    if order is CursorOrder.ID:
+        query = query.order_by(CVERecord.id)
+        if after is not None:
+            query = query.where(CVERecord.id > after[0])
+        records = (await session.execute(query.limit(limit))).all()
+    else:
+        # NULLs can't be compared with a row value, so records with and without
+        # date_published are read by two range scans, one after another
+        after_date, after_id = after if after is not None else (None, None)
+        records = []
+        if after is None or after_date is not None:
+            dated = query.where(CVERecord.date_published.is_not(None)).order_by(
+                CVERecord.date_published.desc(), CVERecord.id.desc()
+            )
+            if after is not None:
+                dated = dated.where(
+                    tuple_(CVERecord.date_published, CVERecord.id) < tuple_(after_date, after_id)
+                )
+            records = (await session.execute(dated.limit(limit))).all()
+        if len(records) < limit:
+            undated = query.where(CVERecord.date_published.is_(None)).order_by(CVERecord.id.desc())
+            if after is not None and after_date is None:
+                undated = undated.where(CVERecord.id < after_id)
+            records += (await session.execute(undated.limit(limit - len(records)))).all()
+
+    next_cursor = encode_cursor(order, records[size - 1]) if len(records) > size else None
+    return records[:size], next_cursor
+
+
+async def fetch_offset_page(
+    session: AsyncSession,
+    query: Select,
+    counts: CountCache,
+) -> tuple[list[Row], int | None, Params]:
+    """Rows of the page requested with `page` and `size` parameters, total number of rows and the parameters"""
+
+    params = resolve_params()
+    raw_params = params.to_raw_params().as_limit_offset()
+    total = await count_rows(session, query, COUNT_STRATEGY, counts)
+    rows = (await session.execute(query.limit(raw_params.limit).offset(raw_params.offset))).all()
+    return rows, total, params
@@ -1,18 +1,33 @@
 import json
+import math
 from typing import Any
 
-from fastapi import APIRouter, Depends, status
-from fastapi.responses import Response, JSONResponse
-from fastapi_pagination import Page
-from fastapi_pagination.ext.sqlalchemy import paginate
+from fastapi import APIRouter, Depends, Header, Query, Request, status
+from fastapi.responses import Response, JSONResponse, StreamingResponse
+from fastapi_pagination import Page, create_page
+from pydantic import ValidationError
+from sqlalchemy import String, any_, bindparam, text
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.future import select
+from sqlalchemy.orm import joinedload, selectinload
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.dependencies import get_session
-from app.models import CVERecord, CnaContainer, AdpContainer
+from app.bulk import BATCH_SIZE, LineResult, format_validation_error, insert_records, iter_lines
+from app.cache import ResponseCache, etag_matches
+from app.config import FAST_SERIALIZATION
+from app.constants import CursorOrder, ExportFormat
+from app.counting import CountCache
+from app.dependencies import get_cache, get_counts, get_session
+from app.export import export_records
+from app.filters import CVERecordFilter, SortedCVERecordFilter, UnsupportedFilter
+from app.models import CVE_RECORD_COLUMNS, CVERecord, CnaContainer, AdpContainer
+from app.pagination import InvalidCursor, fetch_offset_page, fetch_page
 from app.schemas import (
-    CVERecordSchema, GetCVERecordSchema, CreateCVERecordSchema, ResponseOnCreate
+    CVERecordSchema, CursorPage, GetCVERecordSchema, CreateCVERecordSchema, ResponseOnCreate,
+    SearchResultSchema, BatchGetSchema, BatchGetResponseSchema,
 )
+from app.search import search_cve_records
+from app.serialization import cve_record_to_dict, dump_cve_record_details, dumps, json_response
 
 
 router = APIRouter(
@@ -23,26 +38,119 @@ router = APIRouter(
 
 # define session dependency to reuse it in the relevant APIs
 SessionDep = Depends(get_session)
+CacheDep = Depends(get_cache)
+CountsDep = Depends(get_counts)
 
 
 @router.get("/")
-async def list_cve_records(session: AsyncSession = SessionDep) -> Page[CVERecordSchema]:
+async def list_cve_records(
+    user_filter: SortedCVERecordFilter = Depends(),
+    session: AsyncSession = SessionDep,
+    counts: CountCache = CountsDep,
+) -> Page[CVERecordSchema]:
     """Returns basic info about CVE records (without containers info)"""
     
-    # TODO: implement filtering
-    # query = select(CVERecord)
-    # query = user_filter.filter(query)
-    # query = user_filter.sort(query)
-    # result = await db.execute(query)
-    # return result.scalars().all()
+    try:
+        user_filter.check()
+    except UnsupportedFilter as error:
+        return JSONResponse(content={"message": str(error)}, status_code=status.HTTP_400_BAD_REQUEST)
     
-    return await paginate(session, select(CVERecord))
+    query = select(*CVE_RECORD_COLUMNS)
+    query = user_filter.filter(query)
+    query = user_filter.sort(query)
+    rows, total, params = await fetch_offset_page(session, query, counts)
+    
+    if FAST_SERIALIZATION:
+        return json_response({
+            "items": [cve_record_to_dict(row) for row in rows],
+            "total": total,
+            "page": params.page,
+            "size": params.size,
+            "pages": math.ceil(total / params.size) if total is not None else None,
+        })
+    return create_page(rows, total, params)
+
+
+@router.get("/cursor")
+async def list_cve_records_by_cursor(
+    order_by: CursorOrder = CursorOrder.ID,
+    cursor: str | None = None,
+    size: int = Query(50, ge=1, le=100),
+    user_filter: CVERecordFilter = Depends(),
+    session: AsyncSession = SessionDep,
+) -> CursorPage[CVERecordSchema]:
+    """
+    Returns basic info about CVE records page by page (keyset pagination).
+    Pass `next_cursor` of the response to get the next page.
+    """
+    
+    try:
+        records, next_cursor = await fetch_page(
+            session, user_filter.filter(select(*CVE_RECORD_COLUMNS)), order_by, cursor, size
+        )
+    except InvalidCursor as error:
+        return JSONResponse(content={"message": str(error)}, status_code=status.HTTP_400_BAD_REQUEST)
+    
+    if FAST_SERIALIZATION:
+        return json_response({
+            "items": [cve_record_to_dict(record) for record in records],
+            "size": size,
+            "next_cursor": next_cursor,
+        })
+    return {"items": records, "size": size, "next_cursor": next_cursor}
+
+
+@router.get("/export", response_class=StreamingResponse)
+async def export_cve_records(
+    request: Request,
+    export_format: ExportFormat = Query(ExportFormat.NDJSON, alias="format"),
+    include_containers: bool = False,
+    user_filter: CVERecordFilter = Depends(),
+):
+    """Stream all CVE records matching the filters as NDJSON or CSV, ordered by id"""
+    
+    if include_containers:
+        # containers of every batch of records are loaded by two queries
+        query = select(CVERecord).options(
+            selectinload(CVERecord.cna_container), selectinload(CVERecord.adp_containers)
+        )
+    else:
+        query = select(*CVE_RECORD_COLUMNS)
+    query = user_filter.filter(query).order_by(CVERecord.id)
+    
+    return StreamingResponse(
+        export_records(request.app.state.session_factory, query, export_format, include_containers),
+        media_type="text/csv" if export_format is ExportFormat.CSV else "application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="cves.{export_format.value}"'},
+    )
+
+
+@router.get("/search")
+async def search(
+    q: str = Query(min_length=1, max_length=256, description="words, \"quoted phrase\", or, -excluded"),
+    cursor: str | None = None,
+    size: int = Query(20, ge=1, le=100),
+    session: AsyncSession = SessionDep,
+) -> CursorPage[SearchResultSchema]:
+    """Full-text search over titles and descriptions of containers, the most relevant first"""
+    
+    try:
+        results, next_cursor = await search_cve_records(session, q, cursor, size)
+    except InvalidCursor as error:
+        return JSONResponse(content={"message": str(error)}, status_code=status.HTTP_400_BAD_REQUEST)
+    
+    if FAST_SERIALIZATION:
+        # rows of the search query have the fields of SearchResultSchema
+        return json_response({"items": results, "size": size, "next_cursor": next_cursor})
+    return {"items": results, "size": size, "next_cursor": next_cursor}
 
 
 @router.post("/")
 async def create_cve_record(
     data: CreateCVERecordSchema,
-    session: AsyncSession = SessionDep
+    session: AsyncSession = SessionDep,
+    cache: ResponseCache = CacheDep,
+    counts: CountCache = CountsDep,
 ) -> ResponseOnCreate:
     """Create CVE record alongside its containers (cna, adp)"""
     
@@ -67,18 +175,139 @@ async def create_cve_record(
     
     session.add_all(entities_to_create)
     await session.commit()
+    cache.invalidate(cve_record_id)
+    counts.add_to_total(1)
     
     return {"success": True, 'cve_id': cve_record_id}
 
 
+@router.post("/bulk", response_class=StreamingResponse)
+async def bulk_create_cve_records(
+    request: Request,
+    session: AsyncSession = SessionDep,
+    cache: ResponseCache = CacheDep,
+    counts: CountCache = CountsDep,
+):
+    """
+    Create CVE records from NDJSON body, one `CreateCVERecordSchema` per line.
+    Returns NDJSON with `{"line": n, "id": ...}` or `{"line": n, "error": ...}` for every
+    non-empty line and `{"created": ..., "failed": ...}` at the end.
+    """
+    
+    # the payload is never held in memory as a whole, only short results of its lines;
+    # results are sent after the body is read: Starlette can't receive the body of
+    # a request while its streaming response is being sent
+    results = []
+    batch = []
+    line_number = 0
+    async for line in iter_lines(request.stream()):
+        line_number += 1
+        if line is None:
+            results.append(LineResult(line_number, error="line is too long"))
+            continue
+        if not line.strip():
+            continue
+        try:
+            batch.append((line_number, CreateCVERecordSchema.model_validate_json(line)))
+        except ValidationError as error:
+            results.append(LineResult(line_number, error=format_validation_error(error)))
+        if len(batch) >= BATCH_SIZE:
+            results += await insert_records(session, batch)
+            batch = []
+    if batch:
+        results += await insert_records(session, batch)
+    
+    created = 0
+    for result in results:
+        if result.cve_id is not None:
+            cache.invalidate(result.cve_id)
+            created += 1
+    counts.add_to_total(created)
+    results.sort()
+    
+    def iter_results():
+        for result in results:
+            yield result.to_ndjson()
+        yield json.dumps({"created": created, "failed": len(results) - created}).encode() + b"\n"
+    
+    return StreamingResponse(iter_results(), media_type="application/x-ndjson")
+
+
+@router.post("/batch-get")
+async def batch_get_cve_records(
+    data: BatchGetSchema,
+    session: AsyncSession = SessionDep,
+    cache: ResponseCache = CacheDep,
+) -> BatchGetResponseSchema:
+    """Returns full info about many CVE records at once, and ids which were not found"""
+    
+    ids = list(dict.fromkeys(data.ids))
+    bodies = {}
+    for cve_id in ids:
+        if (cached := cache.get(cve_id)) is not None:
+            bodies[cve_id] = cached.body
+    
+    not_cached = [cve_id for cve_id in ids if cve_id not in bodies]
+    if not_cached:
+        generation = cache.generation
+        # one query for records (one array parameter whatever the number of ids)
+        # and one query per container table
+        cve_records = await session.scalars(
+            select(CVERecord)
+            .where(CVERecord.id == any_(bindparam("ids", not_cached, type_=ARRAY(String))))
+            .options(selectinload(CVERecord.cna_container), selectinload(CVERecord.adp_containers))
+        )
+        for cve_record in cve_records:
+            bodies[cve_record.id] = cache.set(cve_record.id, dump_cve_record_details(cve_record), generation).body
+    
+    # cached bodies are joined as they are, without decoding them
+    items = b",".join(bodies[cve_id] for cve_id in ids if cve_id in bodies)
+    missing = [cve_id for cve_id in ids if cve_id not in bodies]
+    return Response(
+        content=b'{"items":[' + items + b'],"missing":' + dumps(missing) + b"}",
+        media_type="application/json",
+    )
+
+
 @router.get("/{cve_id}")
-async def get_cve_record(cve_id: str, session: AsyncSession = SessionDep) -> GetCVERecordSchema:
+async def get_cve_record(
+    cve_id: str,
+    if_none_match: str | None = Header(None),
+    session: AsyncSession = SessionDep,
+    cache: ResponseCache = CacheDep,
+) -> GetCVERecordSchema:
     """Returns full info about CVE records (with containers info)"""
-    cve_record = await session.get(CVERecord, cve_id)
-    if cve_record:
-        return cve_record
-    else:
+    
+    cached = cache.get(cve_id)
+    if cached is None:
+        generation = cache.generation
+        cve_record = await session.get(
+            CVERecord,
+            cve_id,
+            # one query for the record with its CNA container and one for ADP containers
+            options=[joinedload(CVERecord.cna_container), selectinload(CVERecord.adp_containers)],
+        )
+        if cve_record is None:
+            return Response(status_code=status.HTTP_404_NOT_FOUND)
+        cached = cache.set(cve_id, dump_cve_record_details(cve_record), generation)
+    
+    if etag_matches(if_none_match, cached.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": cached.etag})
+    return Response(content=cached.body, media_type="application/json", headers={"ETag": cached.etag})
+
+
+@router.get("/{cve_id}/raw")
+async def get_raw_cve_document(cve_id: str, session: AsyncSession = SessionDep) -> Response:
+    """Returns original JSON of CVE record, as it was loaded from cvelistV5"""
+    
+    # one lookup by primary key, jsonb is rendered as text by Postgres and sent as is
+    document = await session.scalar(
+        text("SELECT document::text FROM cve_documents WHERE cve_id = :cve_id"),
+        {"cve_id": cve_id},
+    )
+    if document is None:
         return Response(status_code=status.HTTP_404_NOT_FOUND)
+    return Response(content=document, media_type="application/json")
 
 
 @router.put("/{cve_id}")
@@ -94,13 +323,20 @@ async def update_cve_record(cve_id: str, session: AsyncSession = SessionDep) ->
 
 
 @router.delete("/{cve_id}")
-async def delete_cve_record(cve_id: str, session: AsyncSession = SessionDep) -> Response:
+async def delete_cve_record(
+    cve_id: str,
+    session: AsyncSession = SessionDep,
+    cache: ResponseCache = CacheDep,
+    counts: CountCache = CountsDep,
+) -> Response:
     """Delete CVE record and all connected data by CVE id"""
     
     cve_record = await session.get(CVERecord, cve_id)
     if cve_record:
         await session.delete(cve_record)
         await session.commit()
+        cache.invalidate(cve_id)
+        counts.add_to_total(-1)
         return Response(status_code=status.HTTP_204_NO_CONTENT)
     else:
         return Response(status_code=status.HTTP_404_NOT_FOUND)
@@ -1,7 +1,7 @@
 import enum
 import uuid
 from datetime import datetime
-from typing import Annotated, List
+from typing import Annotated, Generic, List, TypeVar
 
 from pydantic import BaseModel, ConfigDict, StringConstraints, Field
 
@@ -21,6 +21,25 @@ class CVERecordSchema(BaseModel):
     date_updated: datetime | None = None
 
 
+ItemT = TypeVar('ItemT')
+
+
+class CursorPage(BaseModel, Generic[ItemT]):
+    items: list[ItemT]
+    size: int
+    # None on the last page
+    next_cursor: str | None = None
+
+
+class SearchResultSchema(BaseModel):
+    cve_id: str
+    state: CveState
+    title: str | None = None
+    rank: float
+    # HTML: escaped fragments of title and description with matches wrapped in <b></b>
+    headline: str
+
+
 class CnaContainerSchema(BaseModel):
     model_config = ConfigDict(from_attributes=True)
     
@@ -79,6 +98,16 @@ class CreateCVERecordSchema(BaseModel):
     adp_containers: list[CreateAdpContainerSchema] = Field(description='same structure as cna_container', default=[])
     
 
+class BatchGetSchema(BaseModel):
+    ids: list[str] = Field(min_length=1, max_length=500)
+
+
+class BatchGetResponseSchema(BaseModel):
+    # in the order of requested ids
+    items: list[GetCVERecordSchema]
+    missing: list[str]
+
+
 class BaseResponseSchema(BaseModel):
 	success: bool
 
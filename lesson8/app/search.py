@@ -0,0 +1,90 @@
+"""Full-text search over titles and descriptions of CNA and ADP containers.
+
+Containers have a generated `search_vector` column with a GIN index, so
+only matching containers are read. Results are ranked and paged with a
+keyset cursor on (rank, CVE id); snippets are built only for the page.
+"""
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.pagination import InvalidCursor, dump_cursor, load_cursor
+
+
+SEARCH_CONFIG = 'english'
+HEADLINE_OPTIONS = 'MaxFragments=2, MinWords=10, MaxWords=30, StartSel=<b>, StopSel=</b>'
+# the headline is HTML: the text is escaped before <b></b> are added by ts_headline,
+# the parser keeps entities like &lt; as one token, so matching is not changed
+HTML_ESCAPES = (('&', '&amp;'), ('<', '&lt;'), ('>', '&gt;'))
+
+
+def escape_html(expression: str) -> str:
+    """SQL expression escaping HTML special characters of the text expression, & first"""
+
+    for char, entity in HTML_ESCAPES:
+        expression = f"replace({expression}, '{char}', '{entity}')"
+    return expression
+
+
+# the best matching container of every CVE record
+SEARCH_SQL = text(f"""
+WITH query AS (
+    SELECT websearch_to_tsquery('{SEARCH_CONFIG}', :q) AS query
+), matches AS (
+    SELECT DISTINCT ON (cve_record_id) cve_record_id, title, description, rank
+    FROM (
+        SELECT cve_record_id, title, description, ts_rank(search_vector, query) AS rank
+        FROM cna_containers, query
+        WHERE search_vector @@ query
+        UNION ALL
+        SELECT cve_record_id, title, description, ts_rank(search_vector, query) AS rank
+        FROM adp_containers, query
+        WHERE search_vector @@ query
+    ) AS container_matches
+    ORDER BY cve_record_id, rank DESC
+), page AS (
+    SELECT cve_record_id, title, description, rank
+    FROM matches
+    WHERE CAST(:after_rank AS real) IS NULL
+       OR (rank, cve_record_id) < (CAST(:after_rank AS real), CAST(:after_id AS varchar))
+    ORDER BY rank DESC, cve_record_id DESC
+    LIMIT :limit
+)
+SELECT page.cve_record_id AS cve_id, cves.state, page.title, page.rank,
+       ts_headline('{SEARCH_CONFIG}', {escape_html("concat_ws(' ', page.title, page.description)")}, query.query,
+                   '{HEADLINE_OPTIONS}') AS headline
+FROM page
+JOIN cves ON cves.id = page.cve_record_id
+CROSS JOIN query
+ORDER BY page.rank DESC, page.cve_record_id DESC
+""")
+
+
+def decode_search_cursor(cursor: str) -> tuple[float, str]:
+    try:
+        rank, cve_id = load_cursor(cursor)
+        return float(rank), str(cve_id)
+    except (ValueError, TypeError):
+        raise InvalidCursor('invalid cursor')
+
+
+async def search_cve_records(
+    session: AsyncSession,
+    q: str,
+    cursor: str | None,
+    size: int,
+) -> tuple[list[dict], str | None]:
+    """Returns a page of ranked matches and the cursor of the next page"""
+
+    after_rank, after_id = decode_search_cursor(cursor) if cursor else (None, None)
+    result = await session.execute(
+        SEARCH_SQL,
+        {'q': q, 'after_rank': after_rank, 'after_id': after_id, 'limit': size + 1},
+    )
+    rows = [dict(row) for row in result.mappings()]
+
+    next_cursor = None
+    if len(rows) > size:
+        # rank is real (float4), it is sent back exactly as Postgres returned it
+        next_cursor = dump_cursor([rows[size - 1]['rank'], rows[size - 1]['cve_id']])
+    return rows[:size], next_cursor
@@ -0,0 +1,111 @@
+"""Fast path of JSON responses: rows are encoded by orjson, without Pydantic models.
+
+Dicts are built with the fields of the response schemas in the same order
+and values are rendered the same way (strings of `strip_whitespace` fields
+are stripped like Pydantic does), so clients and OpenAPI schemas see no
+difference. Values are not validated again: they come from database
+columns with the same constraints as the schemas.
+"""
+
+from datetime import date, datetime, time
+from typing import Annotated, Any, Iterable, get_args, get_origin
+
+import orjson
+from fastapi.responses import Response
+from pydantic import BaseModel
+
+from app.config import FAST_SERIALIZATION
+from app.schemas import AdpContainerSchema, CVERecordSchema, CnaContainerSchema, GetCVERecordSchema
+
+
+def has_strip_whitespace(annotation: Any) -> bool:
+    """StringConstraints(strip_whitespace=True) in an annotation, also inside `... | None`"""
+
+    if get_origin(annotation) is Annotated:
+        _, *metadata = get_args(annotation)
+        return any(getattr(item, 'strip_whitespace', False) for item in metadata)
+    return any(has_strip_whitespace(arg) for arg in get_args(annotation))
+
+
+def get_stripped_fields(schema: type[BaseModel]) -> frozenset[str]:
+    return frozenset(
+        name for name, field in schema.model_fields.items()
+        if has_strip_whitespace(field.annotation)
+        or any(getattr(item, 'strip_whitespace', False) for item in field.metadata)
+    )
+
+
+CVE_RECORD_FIELDS = tuple(CVERecordSchema.model_fields)
+CNA_CONTAINER_FIELDS = tuple(CnaContainerSchema.model_fields)
+ADP_CONTAINER_FIELDS = tuple(AdpContainerSchema.model_fields)
+GET_CVE_RECORD_FIELDS = tuple(
+    field for field in GetCVERecordSchema.model_fields if field not in ('cna_container', 'adp_containers')
+)
+CVE_RECORD_STRIPPED = get_stripped_fields(CVERecordSchema)
+CNA_CONTAINER_STRIPPED = get_stripped_fields(CnaContainerSchema)
+ADP_CONTAINER_STRIPPED = get_stripped_fields(AdpContainerSchema)
+GET_CVE_RECORD_STRIPPED = get_stripped_fields(GetCVERecordSchema)
+OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME
+
+
+def encode_default(value: Any) -> Any:
+    # dates are Date columns behind datetime fields, Pydantic renders them as midnight
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, date):
+        return datetime.combine(value, time()).isoformat()
+    raise TypeError(f'Type is not JSON serializable: {type(value).__name__}')
+
+
+def dumps(data: Any) -> bytes:
+    return orjson.dumps(data, default=encode_default, option=OPTIONS)
+
+
+def dumps_lines(items: Iterable[Any]) -> bytes:
+    return b''.join(
+        orjson.dumps(item, default=encode_default, option=OPTIONS | orjson.OPT_APPEND_NEWLINE)
+        for item in items
+    )
+
+
+def pick(item: Any, fields: tuple[str, ...], stripped: frozenset[str] = frozenset()) -> dict:
+    """Fields of a row or an ORM object, fields missing in it are None like defaults of the schemas"""
+
+    data = {field: getattr(item, field, None) for field in fields}
+    for field in stripped:
+        if isinstance(value := data[field], str):
+            data[field] = value.strip()
+    return data
+
+
+def cve_record_to_dict(row: Any) -> dict:
+    """CVERecordSchema of a row"""
+
+    return pick(row, CVE_RECORD_FIELDS, CVE_RECORD_STRIPPED)
+
+
+def cve_record_details_to_dict(cve_record: Any) -> dict:
+    """GetCVERecordSchema of CVERecord with loaded containers"""
+
+    data = pick(cve_record, GET_CVE_RECORD_FIELDS, GET_CVE_RECORD_STRIPPED)
+    cna_container = cve_record.cna_container
+    data['cna_container'] = (
+        pick(cna_container, CNA_CONTAINER_FIELDS, CNA_CONTAINER_STRIPPED) if cna_container is not None else None
+    )
+    data['adp_containers'] = [
+        pick(adp_container, ADP_CONTAINER_FIELDS, ADP_CONTAINER_STRIPPED)
+        for adp_container in cve_record.adp_containers
+    ]
+    return data
+
+
+def dump_cve_record_details(cve_record: Any) -> bytes:
+    """JSON of GetCVERecordSchema, the body of GET /cves/{cve_id} kept in the cache"""
+
+    if FAST_SERIALIZATION:
+        return dumps(cve_record_details_to_dict(cve_record))
+    return GetCVERecordSchema.model_validate(cve_record, from_attributes=True).model_dump_json().encode()
+
+
+def json_response(data: Any) -> Response:
+    return Response(content=dumps(data), media_type="application/json")
@@ -0,0 +1,97 @@
+"""Check with EXPLAIN that supported filter and sort combinations of CVE list use indexes.
+
+All combinations of filters and sort keys are tried: the ones accepted by
+SortedCVERecordFilter.check() must not scan the table, the rest are
+rejected by GET /cves/ with 400.
+
+Run against a database loaded with CVE records (on a small table Postgres
+prefers a sequential scan anyway):
+    python -m bench.explain_filters
+"""
+
+import asyncio
+import itertools
+import json
+import sys
+from datetime import date
+
+from sqlalchemy import select, text
+from sqlalchemy.dialects import postgresql
+
+from app.constants import CveState, SortKey
+from app.db import get_engine
+from app.filters import SortedCVERecordFilter, UnsupportedFilter
+from app.models import CVE_RECORD_COLUMNS
+
+
+# a value of every filter, ranges are given by both bounds
+FILTER_VALUES = {
+    'state': {'state': CveState.PUBLISHED},
+    'assigner_short_name': {'assigner_short_name': 'mitre'},
+    'date_published': {'date_published_from': date(2024, 1, 1), 'date_published_to': date(2024, 3, 31)},
+    'date_updated': {'date_updated_from': date(2024, 6, 1), 'date_updated_to': date(2024, 6, 30)},
+    'year': {'year': 2021},
+}
+
+
+def make_cases() -> tuple[dict[str, SortedCVERecordFilter], list[str]]:
+    """Every combination of filters and sort keys: supported ones by name, and names of rejected ones"""
+
+    supported = {}
+    rejected = []
+    for count in range(len(FILTER_VALUES) + 1):
+        for names in itertools.combinations(FILTER_VALUES, count):
+            values = {key: value for name in names for key, value in FILTER_VALUES[name].items()}
+            for sort_by in SortKey:
+                user_filter = SortedCVERecordFilter(**values, sort_by=sort_by)
+                name = f"{' + '.join(names) or 'no filters'}, sort by {sort_by.value}"
+                try:
+                    user_filter.check()
+                except UnsupportedFilter:
+                    rejected.append(name)
+                else:
+                    supported[name] = user_filter
+    return supported, rejected
+
+
+def find_scans(plan: dict) -> list[str]:
+    """Scan nodes of the plan, e.g. 'Index Scan on cves using ix_cves_date_published_id'"""
+
+    scans = []
+    if plan['Node Type'].endswith('Scan'):
+        scan = f"{plan['Node Type']} on {plan.get('Relation Name')}"
+        if index_name := plan.get('Index Name'):
+            scan += f' using {index_name}'
+        scans.append(scan)
+    for subplan in plan.get('Plans', []):
+        scans += find_scans(subplan)
+    return scans
+
+
+async def main() -> int:
+    engine = get_engine()
+    failed = 0
+    supported, rejected = make_cases()
+    async with engine.connect() as conn:
+        for name, user_filter in supported.items():
+            # the query of GET /cves/
+            query = user_filter.sort(user_filter.filter(select(*CVE_RECORD_COLUMNS))).limit(50)
+            sql = query.compile(dialect=postgresql.dialect(), compile_kwargs={'literal_binds': True})
+            result = await conn.execute(text(f'EXPLAIN (FORMAT JSON) {sql}'))
+            explain = result.scalar()
+            # asyncpg returns json as text
+            if isinstance(explain, str):
+                explain = json.loads(explain)
+            scans = find_scans(explain[0]['Plan'])
+            uses_index = all('Seq Scan' not in scan for scan in scans)
+            failed += not uses_index
+            print(f"{'OK  ' if uses_index else 'SEQ '} {name}: {'; '.join(scans)}")
+    await engine.dispose()
+    print(f'{len(supported)} combinations use indexes, {len(rejected)} are rejected with 400:')
+    for name in rejected:
+        print(f'400  {name}')
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
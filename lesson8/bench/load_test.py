@@ -0,0 +1,267 @@
+"""Seed a local Postgres with synthetic CVE records and measure latency of the API under load.
+
+Requests are sent by an in-process async HTTP client (httpx with ASGI transport),
+so the numbers include routing, validation, serialization and the database, but
+not a server and the network. Tables are truncated before seeding, so use
+a separate database. Usage:
+    python -m bench.load_test --records 10000 --requests 5000 --concurrency 32 --output results.json
+    python -m bench.load_test --baseline results.json --max-regression 0.2
+
+The workload is generated from --seed before the run, the same arguments
+produce the same sequence of requests.
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import random
+import sys
+import time
+import uuid
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+
+import httpx
+from sqlalchemy import insert, text
+
+from app.constants import CveState
+from app.db import get_engine
+from app.main import app
+from app.models import CVERecord, CnaContainer
+
+
+ENDPOINTS = ('list', 'detail', 'create', 'delete')
+DEFAULT_MIX = 'list=40,detail=50,create=5,delete=5'
+SEED_CHUNK_SIZE = 1000
+LIST_PAGE_SIZE = 50
+# list requests go to the first pages, as clients usually do
+LIST_MAX_PAGE = 20
+ASSIGNERS = ['mitre', 'redhat', 'GitHub_M', 'wordfence', 'VulDB', 'Patchstack']
+
+
+def parse_mix(value: str) -> dict[str, int]:
+    mix = {}
+    for part in value.split(','):
+        endpoint, _, weight = part.partition('=')
+        if endpoint not in ENDPOINTS or not weight.isdigit():
+            raise argparse.ArgumentTypeError(f'invalid mix {part!r}, expected e.g. {DEFAULT_MIX}')
+        mix[endpoint] = int(weight)
+    return mix
+
+
+def make_cve_id(index: int) -> str:
+    return f'CVE-2024-{10000 + index}'
+
+
+def make_seed_rows(rnd: random.Random, count: int):
+    for index in range(count):
+        published = date(2020, 1, 1) + timedelta(days=rnd.randrange(5 * 365))
+        cve_row = {
+            'id': make_cve_id(index),
+            'state': CveState.PUBLISHED,
+            'assigner_org_id': uuid.UUID(int=rnd.getrandbits(128)),
+            'assigner_short_name': rnd.choice(ASSIGNERS),
+            'date_reserved': published - timedelta(days=rnd.randrange(90)),
+            'date_published': published,
+            'date_updated': published + timedelta(days=rnd.randrange(365)),
+        }
+        cna_row = {
+            'cve_record_id': cve_row['id'],
+            'title': f'Improper input validation in component {rnd.randrange(1000)}',
+            'description': 'A vulnerability allows a remote attacker to execute arbitrary code. ' * rnd.randint(1, 8),
+            'date_assigned': cve_row['date_reserved'],
+            'date_public': published,
+        }
+        yield cve_row, cna_row
+
+
+async def seed(records: int, seed_value: int):
+    engine = get_engine()
+    rnd = random.Random(seed_value)
+    async with engine.begin() as conn:
+        await conn.execute(text("TRUNCATE cves, cna_containers, adp_containers"))
+        rows = make_seed_rows(rnd, records)
+        while chunk := list(itertools.islice(rows, SEED_CHUNK_SIZE)):
+            await conn.execute(insert(CVERecord), [cve_row for cve_row, _ in chunk])
+            await conn.execute(insert(CnaContainer), [cna_row for _, cna_row in chunk])
+        # statistics for the planner and estimated counts
+        await conn.execute(text("ANALYZE cves"))
+        await conn.execute(text("ANALYZE cna_containers"))
+    await engine.dispose()
+
+
+def make_plan(args: argparse.Namespace) -> list[tuple]:
+    """Requests of the run: (endpoint, argument)"""
+
+    rnd = random.Random(args.seed)
+    endpoints = list(args.mix)
+    weights = list(args.mix.values())
+    # a few ids get most of detail requests: weight of k-th popular id is 1 / k ** skew
+    popular_ids = [make_cve_id(index) for index in range(args.records)]
+    rnd.shuffle(popular_ids)
+    id_weights = list(itertools.accumulate(1 / rank ** args.skew for rank in range(1, args.records + 1)))
+    pages = min(LIST_MAX_PAGE, max(args.records // LIST_PAGE_SIZE, 1))
+
+    plan = []
+    for endpoint in rnd.choices(endpoints, weights, k=args.warmup + args.requests):
+        if endpoint == 'list':
+            plan.append(('list', rnd.randint(1, pages)))
+        elif endpoint == 'detail':
+            plan.append(('detail', rnd.choices(popular_ids, cum_weights=id_weights)[0]))
+        elif endpoint == 'create':
+            published = date(2024, 1, 1) + timedelta(days=rnd.randrange(365))
+            plan.append(('create', {
+                'assigner_org_id': str(uuid.UUID(int=rnd.getrandbits(128))),
+                'assigner_short_name': rnd.choice(ASSIGNERS),
+                'date_published': datetime.combine(published, datetime.min.time()).isoformat(),
+                'cna_container': {'title': 'Synthetic record', 'description': 'Created by the load test.'},
+            }))
+        else:
+            # deletes records created during the run, the seeded set stays the same
+            plan.append(('delete', None))
+    return plan
+
+
+async def send(client: httpx.AsyncClient, endpoint: str, argument, created: list[str]) -> tuple[str, int]:
+    if endpoint == 'delete' and not created:
+        endpoint, argument = 'create', {'assigner_org_id': str(uuid.UUID(int=0))}
+
+    if endpoint == 'list':
+        response = await client.get('/cves/', params={'page': argument, 'size': LIST_PAGE_SIZE})
+    elif endpoint == 'detail':
+        response = await client.get(f'/cves/{argument}')
+    elif endpoint == 'create':
+        response = await client.post('/cves/', json=argument)
+        if response.status_code == 200:
+            created.append(response.json()['cve_id'])
+    else:
+        response = await client.delete(f'/cves/{created.pop()}')
+    return endpoint, response.status_code
+
+
+def percentile(samples: list[float], q: float) -> float:
+    """Nearest-rank percentile of sorted samples"""
+
+    return samples[min(int(q * len(samples)), len(samples) - 1)]
+
+
+def summarize(latencies: dict[str, list[float]], errors: dict[str, int], seconds: float) -> dict:
+    summary = {}
+    for endpoint, samples in sorted(latencies.items()):
+        samples.sort()
+        summary[endpoint] = {
+            'requests': len(samples),
+            'errors': errors[endpoint],
+            'rps': round(len(samples) / seconds, 1),
+            'mean_ms': round(sum(samples) / len(samples) * 1000, 3),
+            'p50_ms': round(percentile(samples, 0.5) * 1000, 3),
+            'p95_ms': round(percentile(samples, 0.95) * 1000, 3),
+            'p99_ms': round(percentile(samples, 0.99) * 1000, 3),
+        }
+    return summary
+
+
+async def drive(client: httpx.AsyncClient, plan: list[tuple], concurrency: int, created: list[str]):
+    """Sends requests of the plan by `concurrency` workers, returns latencies and errors by endpoint"""
+
+    latencies = defaultdict(list)
+    errors = defaultdict(int)
+    requests = iter(plan)
+
+    async def worker():
+        # every worker takes the next request of the plan when its previous request is done
+        for endpoint, argument in requests:
+            start = time.perf_counter()
+            endpoint, status_code = await send(client, endpoint, argument, created)
+            latencies[endpoint].append(time.perf_counter() - start)
+            errors[endpoint] += status_code >= 400
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, errors
+
+
+async def run(args: argparse.Namespace) -> dict:
+    plan = make_plan(args)
+    created = []
+    transport = httpx.ASGITransport(app=app)
+    # ASGI transport doesn't send lifespan events, the engine and caches are created here
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url='http://bench') as client:
+            await drive(client, plan[:args.warmup], args.concurrency, created)
+            start = time.perf_counter()
+            latencies, errors = await drive(client, plan[args.warmup:], args.concurrency, created)
+            seconds = time.perf_counter() - start
+
+    total = sum(len(samples) for samples in latencies.values())
+    return {
+        'started_at': datetime.now().isoformat(timespec='seconds'),
+        'args': {
+            'records': args.records,
+            'requests': args.requests,
+            'warmup': args.warmup,
+            'concurrency': args.concurrency,
+            'mix': args.mix,
+            'skew': args.skew,
+            'seed': args.seed,
+        },
+        'seconds': round(seconds, 3),
+        'rps': round(total / seconds, 1),
+        'errors': sum(errors.values()),
+        'endpoints': summarize(latencies, errors, seconds),
+    }
+
+
+def find_regressions(results: dict, baseline: dict, max_regression: float) -> list[str]:
+    """p95 latencies which grew by more than `max_regression` compared with the baseline"""
+
+    regressions = []
+    for endpoint, summary in results['endpoints'].items():
+        if (base := baseline['endpoints'].get(endpoint)) is None:
+            continue
+        if summary['p95_ms'] > base['p95_ms'] * (1 + max_regression):
+            regressions.append(f"{endpoint}: p95 {base['p95_ms']} ms -> {summary['p95_ms']} ms")
+    return regressions
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description='Load test of CVE API against a local Postgres.')
+    parser.add_argument('--records', type=int, default=10000, help='synthetic CVE records to seed')
+    parser.add_argument('--requests', type=int, default=5000, help='measured requests')
+    parser.add_argument('--warmup', type=int, default=500, help='requests sent before measuring')
+    parser.add_argument('--concurrency', type=int, default=32, help='requests in flight')
+    parser.add_argument('--mix', type=parse_mix, default=DEFAULT_MIX, help='weights of endpoints')
+    parser.add_argument('--skew', type=float, default=1.1, help='Zipf exponent of detail ids, 0 is uniform')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--no-seed', action='store_true', help='reuse records seeded by a previous run')
+    parser.add_argument('--output', default=None, help='JSON file for results')
+    parser.add_argument('--baseline', default=None, help='results of a previous run to compare with')
+    parser.add_argument('--max-regression', type=float, default=0.2, help='allowed growth of p95 latency')
+    args = parser.parse_args()
+
+    # logged SQL of every request would be measured too
+    logging.getLogger("sqlalchemy.engine").setLevel(logging.WARNING)
+
+    if not args.no_seed:
+        start = time.perf_counter()
+        await seed(args.records, args.seed)
+        print(f'Seeded {args.records} records in {time.perf_counter() - start:.1f} s', file=sys.stderr)
+
+    results = await run(args)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    print(json.dumps(results, indent=2))
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = find_regressions(results, json.load(f), args.max_regression)
+        for regression in regressions:
+            print(f'REGRESSION {regression}', file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,127 @@
+"""Check the number of SQL statements sent by every endpoint.
+
+Relationships are `lazy='raise'` and every endpoint loads what it returns
+with explicit options, the numbers below are documented in README. A new
+lazy load or a query in a loop makes the check fail. Run against a database
+loaded with CVE records; a record is created and deleted by the check:
+    python -m bench.query_counts
+"""
+
+import asyncio
+import logging
+import math
+import sys
+from collections.abc import Awaitable, Callable
+
+import httpx
+from sqlalchemy import event, text
+
+from app.export import EXPORT_BATCH_SIZE
+from app.main import app
+
+
+# statements per request at most
+EXPECTED = {
+    # the page and COUNT(*), the total of the whole table is counted once and then kept up to date
+    'GET /cves/': 2,
+    'GET /cves/cursor': 1,
+    'GET /cves/search': 1,
+    # records, then containers of every batch with two IN queries
+    'GET /cves/export': 1,
+    'GET /cves/export?include_containers=true': None,
+    # the record joined with its CNA container and ADP containers, the cache is cleared before
+    'GET /cves/{cve_id}': 2,
+    'GET /cves/{cve_id}/raw': 1,
+    # records of not cached ids and one IN query per container table
+    'POST /cves/batch-get': 3,
+    # the record and its CNA container
+    'POST /cves/': 2,
+    # the record is read and deleted, containers are deleted by ON DELETE CASCADE
+    'DELETE /cves/{cve_id}': 2,
+}
+
+
+class StatementCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+
+    async def measure(self, request: Callable[[], Awaitable[httpx.Response]]) -> tuple[int, httpx.Response]:
+        self.count = 0
+        response = await request()
+        response.raise_for_status()
+        return self.count, response
+
+
+async def main() -> int:
+    # logged SQL is not needed, statements are counted
+    logging.getLogger("sqlalchemy.engine").setLevel(logging.WARNING)
+
+    counter = StatementCounter()
+    failed = 0
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        engine = app.state.engine
+        async with engine.connect() as conn:
+            cve_id, year = (await conn.execute(text(
+                "SELECT id, split_part(id, '-', 2)::int FROM cves ORDER BY id DESC LIMIT 1"
+            ))).one()
+        event.listen(engine.sync_engine, 'before_cursor_execute', counter)
+
+        async with httpx.AsyncClient(transport=transport, base_url='http://bench') as client:
+            app.state.cache.invalidate(cve_id)
+            created = {}
+
+            async def create():
+                response = await client.post('/cves/', json={
+                    'assigner_org_id': '00000000-0000-0000-0000-000000000000',
+                    'cna_container': {'title': 'Query count check', 'description': 'Deleted by the check.'},
+                })
+                created['cve_id'] = response.json().get('cve_id')
+                return response
+
+            requests = {
+                'GET /cves/': lambda: client.get('/cves/', params={'size': 50}),
+                'GET /cves/cursor': lambda: client.get('/cves/cursor', params={'size': 50}),
+                'GET /cves/search': lambda: client.get('/cves/search', params={'q': 'remote code execution'}),
+                'GET /cves/export': lambda: client.get('/cves/export', params={'year': year}),
+                'GET /cves/export?include_containers=true': lambda: client.get(
+                    '/cves/export', params={'year': year, 'include_containers': 'true'}
+                ),
+                'GET /cves/{cve_id}': lambda: client.get(f'/cves/{cve_id}'),
+                # 404 if the loader was run without --store-documents
+                'GET /cves/{cve_id}/raw': lambda: client.get(f'/cves/{cve_id}/raw'),
+                'POST /cves/batch-get': lambda: client.post(
+                    '/cves/batch-get', json={'ids': [cve_id, 'CVE-1999-0000']}
+                ),
+                'POST /cves/': create,
+                'DELETE /cves/{cve_id}': lambda: client.delete(f"/cves/{created['cve_id']}"),
+            }
+            for name, request in requests.items():
+                if name == 'POST /cves/batch-get':
+                    app.state.cache.invalidate(cve_id)
+                try:
+                    count, response = await counter.measure(request)
+                except httpx.HTTPStatusError as error:
+                    if error.response.status_code == 404 and name.endswith('/raw'):
+                        print(f'SKIP {name}: no raw documents')
+                        continue
+                    raise
+
+                expected = EXPECTED[name]
+                if expected is None:
+                    # records of the export are NDJSON lines
+                    batches = math.ceil(response.content.count(b'\n') / EXPORT_BATCH_SIZE)
+                    expected = 1 + 2 * batches
+                ok = count <= expected
+                failed += not ok
+                print(f"{'OK  ' if ok else 'FAIL'} {name}: {count} statements, expected at most {expected}")
+
+        event.remove(engine.sync_engine, 'before_cursor_execute', counter)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
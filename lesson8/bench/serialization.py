@@ -0,0 +1,122 @@
+"""Compare the default response path (Pydantic validation + JSON) with the orjson fast path.
+
+Usage:
+    python -m bench.serialization --page-size 100
+"""
+
+import argparse
+import json
+import random
+import timeit
+import uuid
+from datetime import date, timedelta
+from typing import NamedTuple
+
+from pydantic import TypeAdapter
+
+from app.constants import CveState
+from app.models import AdpContainer, CVERecord, CnaContainer
+from app.schemas import CursorPage, CVERecordSchema, GetCVERecordSchema
+from app.serialization import cve_record_details_to_dict, cve_record_to_dict, dumps
+
+
+class CveRow(NamedTuple):
+    """Row of `select(*CVE_RECORD_COLUMNS)`"""
+    id: str
+    state: CveState
+    assigner_org_id: uuid.UUID
+    assigner_short_name: str
+    date_reserved: date
+    date_published: date
+    date_updated: date
+
+
+def make_row(rnd: random.Random, index: int) -> CveRow:
+    published = date(2024, 1, 1) + timedelta(days=rnd.randrange(365))
+    return CveRow(
+        id=f'CVE-2024-{10000 + index}',
+        state=CveState.PUBLISHED,
+        assigner_org_id=uuid.UUID(int=rnd.getrandbits(128)),
+        assigner_short_name=rnd.choice(['mitre', 'redhat', 'GitHub_M', 'wordfence']),
+        date_reserved=published - timedelta(days=30),
+        date_published=published,
+        date_updated=published + timedelta(days=rnd.randrange(60)),
+    )
+
+
+def make_record(rnd: random.Random, index: int) -> CVERecord:
+    row = make_row(rnd, index)
+    cve_record = CVERecord(**row._asdict())
+    # transient objects, containers are set without loading
+    cve_record.cna_container = CnaContainer(
+        id=index,
+        title='Improper input validation in the parser ' * 2,
+        description='A vulnerability in the parser allows a remote attacker to execute code. ' * 8,
+        date_assigned=row.date_reserved,
+        date_public=row.date_published,
+    )
+    cve_record.adp_containers = [
+        AdpContainer(id=index * 10 + i, title='CISA ADP Vulnrichment', description=None,
+                     date_assigned=None, date_public=None)
+        for i in range(rnd.randrange(3))
+    ]
+    return cve_record
+
+
+def fastapi_json(adapter: TypeAdapter, content) -> bytes:
+    """What FastAPI does with a returned value: validate by response model, serialize, json.dumps"""
+
+    value = adapter.validate_python(content, from_attributes=True)
+    return json.dumps(adapter.dump_python(value, mode='json'), separators=(',', ':')).encode()
+
+
+def measure(name: str, function, number: int) -> float:
+    seconds = min(timeit.repeat(function, number=number, repeat=5)) / number
+    print(f'{name:>32}: {seconds * 1000:.3f} ms')
+    return seconds
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Compare Pydantic and orjson response paths.')
+    parser.add_argument('--page-size', type=int, default=100)
+    parser.add_argument('--number', type=int, default=200)
+    args = parser.parse_args()
+
+    rnd = random.Random(42)
+    rows = [make_row(rnd, i) for i in range(args.page_size)]
+    records = [make_record(rnd, i) for i in range(args.page_size)]
+    page_adapter = TypeAdapter(CursorPage[CVERecordSchema])
+    details_adapter = TypeAdapter(GetCVERecordSchema)
+
+    page = {'items': rows, 'size': args.page_size, 'next_cursor': 'WyJpZCIsIkNWRS0yMDI0LTEwMDk5Il0'}
+    # both paths produce the same document
+    assert json.loads(fastapi_json(page_adapter, page)) == json.loads(
+        dumps({**page, 'items': [cve_record_to_dict(row) for row in rows]})
+    )
+    assert json.loads(fastapi_json(details_adapter, records[0])) == json.loads(
+        dumps(cve_record_details_to_dict(records[0]))
+    )
+    # strip_whitespace fields: descriptions of real CVE records often end with a newline
+    padded_row = rows[0]._replace(assigner_short_name=' mitre ')
+    padded_record = make_record(rnd, args.page_size)
+    padded_record.cna_container.title = ' Improper input validation\n'
+    padded_record.cna_container.description = 'A vulnerability in the parser.\n\n'
+    padded_record.adp_containers = [
+        AdpContainer(id=0, title='\tCISA ADP Vulnrichment ', description=' ', date_assigned=None, date_public=None)
+    ]
+    assert json.loads(fastapi_json(page_adapter, {**page, 'items': [padded_row]})) == json.loads(
+        dumps({**page, 'items': [cve_record_to_dict(padded_row)]})
+    )
+    assert json.loads(fastapi_json(details_adapter, padded_record)) == json.loads(
+        dumps(cve_record_details_to_dict(padded_record))
+    )
+
+    print(f'list page of {args.page_size} records')
+    slow = measure('pydantic', lambda: fastapi_json(page_adapter, page), args.number)
+    fast = measure('orjson', lambda: dumps({**page, 'items': [cve_record_to_dict(row) for row in rows]}), args.number)
+    print(f'{"speedup":>32}: {slow / fast:.1f}x')
+
+    print(f'{args.page_size} records with containers (GET /cves/{{cve_id}})')
+    slow = measure('pydantic', lambda: [fastapi_json(details_adapter, record) for record in records], args.number)
+    fast = measure('orjson', lambda: [dumps(cve_record_details_to_dict(record)) for record in records], args.number)
+    print(f'{"speedup":>32}: {slow / fast:.1f}x')
@@ -0,0 +1,143 @@
+import asyncio
+import json
+
+import asyncpg
+import httpx
+import pytest
+from sqlalchemy import exc
+from sqlalchemy.dialects.postgresql.asyncpg import AsyncAdapt_asyncpg_connection, AsyncAdapt_asyncpg_dbapi
+
+from app import bulk
+from app.bulk import insert_records, is_data_error, iter_lines
+from app.cache import ResponseCache
+from app.counting import CountCache
+from app.dependencies import get_session
+from app.main import app
+from app.schemas import CreateCVERecordSchema
+
+
+DBAPI = AsyncAdapt_asyncpg_dbapi(asyncpg)
+
+
+def translate(error: Exception) -> exc.DBAPIError:
+    """The error as it is raised by SQLAlchemy with asyncpg driver"""
+
+    try:
+        AsyncAdapt_asyncpg_connection._handle_exception_no_connection(DBAPI, error)
+    except Exception as orig:
+        return exc.DBAPIError.instance('INSERT INTO cves ...', {}, orig, DBAPI.Error)
+
+
+class FakeSession:
+    """Rejects statements with NUL characters like Postgres does, keeps committed values"""
+
+    def __init__(self, error: Exception | None = None):
+        self.error = error
+        self.pending = []
+        self.committed = []
+
+    async def execute(self, statement, values):
+        if self.error is not None:
+            raise self.error
+        if any('\x00' in value for row in values for value in row.values() if isinstance(value, str)):
+            raise translate(asyncpg.exceptions.CharacterNotInRepertoireError(
+                'invalid byte sequence for encoding "UTF8": 0x00'
+            ))
+        self.pending += values
+
+    async def commit(self):
+        self.committed += self.pending
+        self.pending = []
+
+    async def rollback(self):
+        self.pending = []
+
+
+async def collect_lines(chunks: list[bytes]) -> list[bytes | None]:
+    async def stream():
+        for chunk in chunks:
+            yield chunk
+
+    return [line async for line in iter_lines(stream())]
+
+
+def make_record(title: str) -> CreateCVERecordSchema:
+    return CreateCVERecordSchema(
+        assigner_org_id='00000000-0000-0000-0000-000000000000',
+        cna_container={'title': title, 'description': 'description'},
+    )
+
+
+def test_lines_split_across_chunks():
+    lines = asyncio.run(collect_lines([b'{"a":', b' 1}\n{"b": 2}\n', b'\n{"c"', b': 3}']))
+
+    assert lines == [b'{"a": 1}', b'{"b": 2}', b'', b'{"c": 3}']
+
+
+def test_too_long_lines_are_skipped(monkeypatch):
+    monkeypatch.setattr(bulk, 'MAX_LINE_BYTES', 8)
+
+    # a long line within one chunk, then one spread over chunks, which is skipped to its end
+    lines = asyncio.run(collect_lines([b'short\n0123456789\nok\n0123', b'45678', b'9abcdef', b'\nlast']))
+
+    assert lines == [b'short', None, b'ok', None, b'last']
+
+
+def test_nul_character_is_a_data_error():
+    error = translate(asyncpg.exceptions.CharacterNotInRepertoireError('0x00'))
+    assert type(error) is exc.DBAPIError
+    assert is_data_error(error)
+    assert not is_data_error(translate(asyncpg.exceptions.ConnectionDoesNotExistError('closed')))
+
+
+def test_poisoned_record_is_isolated():
+    session = FakeSession()
+    records = [(line, make_record('bad\x00title' if line == 3 else 'title')) for line in range(1, 8)]
+
+    results = asyncio.run(insert_records(session, records))
+
+    assert [result.line for result in results] == list(range(1, 8))
+    assert [result.line for result in results if result.error is not None] == [3]
+    created = {result.cve_id for result in results if result.cve_id is not None}
+    assert len(created) == 6
+    assert {values['id'] for values in session.committed if 'state' in values} == created
+
+
+def test_other_errors_are_raised():
+    session = FakeSession(translate(asyncpg.exceptions.ConnectionDoesNotExistError('closed')))
+
+    with pytest.raises(exc.DBAPIError):
+        asyncio.run(insert_records(session, [(1, make_record('title')), (2, make_record('title'))]))
+
+
+def test_bulk_endpoint_reports_every_line():
+    session = FakeSession()
+
+    async def get_fake_session():
+        yield session
+
+    async def post(body: bytes) -> httpx.Response:
+        app.state.cache = ResponseCache(100, 60)
+        app.state.counts = CountCache(60)
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url='http://test') as client:
+            return await client.post('/cves/bulk', content=body)
+
+    lines = [
+        {'assigner_org_id': '00000000-0000-0000-0000-000000000000'},
+        {'assigner_org_id': '00000000-0000-0000-0000-000000000000', 'cna_container': {'title': 'a\u0000b'}},
+        {'state': 'PUBLISHED'},
+        {'assigner_org_id': '00000000-0000-0000-0000-000000000000'},
+    ]
+    app.dependency_overrides[get_session] = get_fake_session
+    try:
+        response = asyncio.run(post(b'\n'.join(json.dumps(line).encode() for line in lines)))
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 200
+    *results, totals = [json.loads(line) for line in response.content.splitlines()]
+    assert [result['line'] for result in results] == [1, 2, 3, 4]
+    assert 'id' in results[0] and 'id' in results[3]
+    assert 'error' in results[1] and 'error' in results[2]
+    assert totals == {'created': 2, 'failed': 2}
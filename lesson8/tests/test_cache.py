@@ -0,0 +1,57 @@
+from app.cache import ResponseCache, etag_matches, make_etag
+
+
+def test_etag_depends_on_body():
+    assert make_etag(b'{"id":1}') == make_etag(b'{"id":1}')
+    assert make_etag(b'{"id":1}') != make_etag(b'{"id":2}')
+    assert make_etag(b'{}').startswith('"') and make_etag(b'{}').endswith('"')
+
+
+def test_etag_matches_any_of_the_tags():
+    etag = make_etag(b'{}')
+    assert etag_matches(etag, etag)
+    assert etag_matches(f'"other", W/{etag}', etag)
+    assert etag_matches('*', etag)
+    assert not etag_matches('"other"', etag)
+    assert not etag_matches(None, etag)
+    assert not etag_matches('', etag)
+
+
+def test_cached_body_is_returned_until_invalidated():
+    cache = ResponseCache(10, 60)
+    entry = cache.set('CVE-2024-1000', b'{}', cache.generation)
+
+    assert cache.get('CVE-2024-1000') == entry
+    cache.invalidate('CVE-2024-1000')
+    assert cache.get('CVE-2024-1000') is None
+    assert cache.counters['hits'] == 1 and cache.counters['invalidations'] == 1
+
+
+def test_body_read_before_invalidation_is_not_cached():
+    cache = ResponseCache(10, 60)
+    generation = cache.generation
+    # another request writes a record while the body is being read
+    cache.invalidate('CVE-2024-1001')
+
+    entry = cache.set('CVE-2024-1000', b'{}', generation)
+    assert entry.body == b'{}'
+    assert cache.get('CVE-2024-1000') is None
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ResponseCache(2, 60)
+    cache.set('a', b'a', cache.generation)
+    cache.set('b', b'b', cache.generation)
+    cache.get('a')
+    cache.set('c', b'c', cache.generation)
+
+    assert list(cache.entries) == ['a', 'c']
+    assert cache.counters['evictions'] == 1
+
+
+def test_expired_entry_is_dropped():
+    cache = ResponseCache(10, 0)
+    cache.set('a', b'a', cache.generation)
+
+    assert cache.get('a') is None
+    assert cache.counters['expirations'] == 1
@@ -0,0 +1,124 @@
+import asyncio
+import json
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql.asyncpg import dialect as asyncpg_dialect
+
+from app.constants import CountStrategy, CveState
+from app.counting import TOTAL_KEY, CountCache, compile_for_driver, count_rows
+from app.filters import CVERecordFilter
+from app.models import CVE_RECORD_COLUMNS
+
+
+def make_query(**filters):
+    return CVERecordFilter(**filters).filter(select(*CVE_RECORD_COLUMNS))
+
+
+class ExplainConnection:
+    dialect = asyncpg_dialect()
+
+    def __init__(self):
+        self.statements = []
+
+    async def exec_driver_sql(self, statement, parameters):
+        self.statements.append((statement, parameters))
+        return ExplainResult()
+
+
+class ExplainResult:
+    def scalar(self):
+        # asyncpg returns json as text
+        return json.dumps([{'Plan': {'Node Type': 'Index Scan', 'Plan Rows': 42}}])
+
+
+class CountingSession:
+    """Returns `total` for COUNT(*) queries and counts them"""
+
+    def __init__(self, total: int):
+        self.total = total
+        self.counted = 0
+
+    async def scalar(self, statement):
+        self.counted += 1
+        return self.total
+
+
+class ExplainSession:
+    def __init__(self):
+        self.conn = ExplainConnection()
+
+    async def connection(self):
+        return self.conn
+
+
+def test_filter_values_are_parameters():
+    sql, parameters = compile_for_driver(
+        make_query(state=CveState.PUBLISHED, assigner_short_name='x :y'), asyncpg_dialect()
+    )
+
+    assert ':y' not in sql
+    assert '$1' in sql and '$2' in sql
+    # enum is sent by name, like SQLAlchemy does
+    assert parameters == ('PUBLISHED', 'x :y')
+
+
+def test_estimated_count_of_filtered_query():
+    session = ExplainSession()
+
+    total = asyncio.run(count_rows(
+        session, make_query(assigner_short_name="x :y'; --"), CountStrategy.ESTIMATED, CountCache(60)
+    ))
+
+    assert total == 42
+    ((statement, parameters),) = session.conn.statements
+    assert statement.startswith('EXPLAIN (FORMAT JSON) SELECT')
+    assert parameters == ("x :y'; --",)
+
+
+def test_no_count():
+    assert asyncio.run(count_rows(None, make_query(), CountStrategy.NONE, CountCache(60))) is None
+
+
+def test_total_is_counted_once_and_kept_up_to_date():
+    session = CountingSession(10)
+    counts = CountCache(60)
+
+    assert asyncio.run(count_rows(session, make_query(), CountStrategy.EXACT, counts)) == 10
+    counts.add_to_total(2)
+    counts.add_to_total(-1)
+    assert asyncio.run(count_rows(session, make_query(), CountStrategy.EXACT, counts)) == 11
+    assert session.counted == 1
+
+
+def test_cached_counts_of_filtered_queries():
+    session = CountingSession(5)
+    counts = CountCache(60)
+
+    for _ in range(2):
+        total = asyncio.run(count_rows(session, make_query(year=2024), CountStrategy.CACHED, counts))
+        assert total == 5
+    assert session.counted == 1
+    # another filter value is another key
+    asyncio.run(count_rows(session, make_query(year=2023), CountStrategy.CACHED, counts))
+    assert session.counted == 2
+    # filtered counts are exact with `exact` strategy
+    asyncio.run(count_rows(session, make_query(year=2024), CountStrategy.EXACT, counts))
+    assert session.counted == 3
+
+
+def test_count_started_before_a_write_is_not_cached():
+    counts = CountCache(60)
+    generation = counts.generation
+    counts.add_to_total(1)
+
+    counts.set(TOTAL_KEY, 10, generation)
+    assert counts.get(TOTAL_KEY) is None
+    counts.set(TOTAL_KEY, 11, counts.generation)
+    assert counts.get(TOTAL_KEY) == 11
+
+
+def test_expired_count_is_counted_again():
+    counts = CountCache(0)
+    counts.set(TOTAL_KEY, 10, counts.generation)
+
+    assert counts.get(TOTAL_KEY) is None
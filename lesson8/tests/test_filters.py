@@ -0,0 +1,63 @@
+from datetime import date
+
+import pytest
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.future import select
+
+from app.constants import CveState, SortKey
+from app.filters import SortedCVERecordFilter, UnsupportedFilter
+from app.models import CVERecord
+
+
+def order_by(user_filter: SortedCVERecordFilter) -> str:
+    query = user_filter.sort(select(CVERecord.id))
+    return str(query.compile(dialect=postgresql.dialect())).partition('ORDER BY ')[2]
+
+
+def test_supports_indexed_combinations():
+    assert SortedCVERecordFilter().supports(SortKey.ID)
+    assert SortedCVERecordFilter(state=CveState.PUBLISHED).supports(SortKey.DATE_PUBLISHED_DESC)
+    assert SortedCVERecordFilter(state=CveState.PUBLISHED).supports(SortKey.DATE_UPDATED)
+    assert SortedCVERecordFilter(assigner_short_name='mitre').supports(SortKey.DATE_PUBLISHED)
+    assert SortedCVERecordFilter(date_updated_from=date(2024, 6, 1)).supports(SortKey.DATE_UPDATED_DESC)
+    assert SortedCVERecordFilter(year=2024).supports(SortKey.ID_DESC)
+
+
+def test_does_not_support_other_combinations():
+    assert not SortedCVERecordFilter(state=CveState.PUBLISHED).supports(SortKey.ID)
+    assert not SortedCVERecordFilter(assigner_short_name='mitre').supports(SortKey.DATE_UPDATED)
+    assert not SortedCVERecordFilter(year=2024).supports(SortKey.DATE_PUBLISHED)
+    assert not SortedCVERecordFilter(date_published_to=date(2024, 1, 1)).supports(SortKey.DATE_UPDATED)
+
+
+@pytest.mark.parametrize('values, sort_by', [
+    ({}, SortKey.ID),
+    ({'year': 2024}, SortKey.ID),
+    ({'state': CveState.PUBLISHED}, SortKey.DATE_PUBLISHED),
+    ({'assigner_short_name': 'mitre'}, SortKey.DATE_PUBLISHED),
+    ({'date_updated_from': date(2024, 6, 1)}, SortKey.DATE_UPDATED),
+    ({'state': CveState.PUBLISHED, 'date_updated_to': date(2024, 6, 30)}, SortKey.DATE_UPDATED),
+])
+def test_default_sort_follows_filters(values, sort_by):
+    user_filter = SortedCVERecordFilter(**values)
+    user_filter.check()
+    assert user_filter.sort_by is sort_by
+
+
+def test_given_sort_is_kept():
+    user_filter = SortedCVERecordFilter(state=CveState.PUBLISHED, sort_by=SortKey.DATE_UPDATED_DESC)
+    user_filter.check()
+    assert user_filter.sort_by is SortKey.DATE_UPDATED_DESC
+    assert order_by(user_filter) == 'cves.date_updated DESC, cves.id DESC'
+
+
+def test_unsupported_sort_lists_supported_ones():
+    with pytest.raises(UnsupportedFilter, match='supported sort_by: date_published, -date_published$'):
+        SortedCVERecordFilter(assigner_short_name='mitre', sort_by=SortKey.ID).check()
+
+
+def test_filters_without_index_are_rejected():
+    with pytest.raises(UnsupportedFilter, match="can't be combined"):
+        SortedCVERecordFilter(state=CveState.PUBLISHED, assigner_short_name='mitre').check()
+    with pytest.raises(UnsupportedFilter, match="can't be combined"):
+        SortedCVERecordFilter(year=2024, date_published_from=date(2024, 1, 1)).check()
@@ -0,0 +1,46 @@
+from datetime import date
+from types import SimpleNamespace
+
+import pytest
+
+from app.constants import CursorOrder
+from app.pagination import InvalidCursor, decode_cursor, dump_cursor, encode_cursor
+
+
+def make_record(cve_id: str, date_published: date | None = None) -> SimpleNamespace:
+    return SimpleNamespace(id=cve_id, date_published=date_published)
+
+
+@pytest.mark.parametrize('order, record, key', [
+    (CursorOrder.ID, make_record('CVE-2024-1000'), ('CVE-2024-1000',)),
+    (
+        CursorOrder.DATE_PUBLISHED,
+        make_record('CVE-2024-1000', date(2024, 2, 29)),
+        (date(2024, 2, 29), 'CVE-2024-1000'),
+    ),
+    (CursorOrder.DATE_PUBLISHED, make_record('CVE-2024-1000'), (None, 'CVE-2024-1000')),
+])
+def test_cursor_points_after_the_record(order, record, key):
+    cursor = encode_cursor(order, record)
+    # safe in a query string without escaping
+    assert cursor.replace('-', '').replace('_', '').isalnum()
+    assert decode_cursor(order, cursor) == key
+
+
+def test_cursor_of_another_order_is_rejected():
+    cursor = encode_cursor(CursorOrder.ID, make_record('CVE-2024-1000'))
+    with pytest.raises(InvalidCursor, match='order_by=id'):
+        decode_cursor(CursorOrder.DATE_PUBLISHED, cursor)
+
+
+@pytest.mark.parametrize('order, cursor', [
+    (CursorOrder.ID, 'not a cursor'),
+    (CursorOrder.ID, dump_cursor([])),
+    (CursorOrder.ID, dump_cursor(['id'])),
+    (CursorOrder.ID, dump_cursor(['id', 'CVE-2024-1000', 'extra'])),
+    (CursorOrder.ID, dump_cursor({'id': 'CVE-2024-1000'})),
+    (CursorOrder.DATE_PUBLISHED, dump_cursor(['date_published', 'yesterday', 'CVE-2024-1000'])),
+])
+def test_invalid_cursors_are_rejected(order, cursor):
+    with pytest.raises(InvalidCursor):
+        decode_cursor(order, cursor)
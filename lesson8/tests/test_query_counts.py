@@ -0,0 +1,158 @@
+"""Statements sent by the endpoints, counted on SQLite.
+
+The same numbers are checked against Postgres by `python -m bench.query_counts`,
+here they are checked without a database server: a new lazy load or a query
+in a loop makes the tests fail.
+"""
+
+import asyncio
+import json
+import re
+
+import httpx
+import pytest
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.cache import ResponseCache
+from app.counting import CountCache
+from app.main import app
+
+
+# the tables of app/models.py without Postgres types, search vectors are never loaded by the endpoints
+SCHEMA = (
+    """
+    CREATE TABLE cves (
+        id VARCHAR(29) PRIMARY KEY,
+        state VARCHAR(9) NOT NULL,
+        assigner_org_id CHAR(32),
+        assigner_short_name VARCHAR(32),
+        date_reserved DATE,
+        date_published DATE,
+        date_updated DATE
+    )
+    """,
+    """
+    CREATE TABLE cna_containers (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        title VARCHAR(256),
+        description VARCHAR(4096) NOT NULL,
+        date_assigned DATE,
+        date_public DATE,
+        cve_record_id VARCHAR(29) NOT NULL REFERENCES cves (id) ON DELETE CASCADE
+    )
+    """,
+    """
+    CREATE TABLE adp_containers (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        title VARCHAR(256),
+        description VARCHAR(4096),
+        date_assigned DATE,
+        date_public DATE,
+        cve_record_id VARCHAR(29) NOT NULL REFERENCES cves (id) ON DELETE CASCADE
+    )
+    """,
+)
+CVE_IDS = [f'CVE-2024-{number}' for number in range(1000, 1005)]
+# SQLite has no arrays, `= ANY (array)` of batch-get is sent as IN over a JSON array
+ANY_ARRAY = re.compile(r'= ANY \(\?\)')
+
+
+def send_arrays_as_json(conn, cursor, statement, parameters, context, executemany):
+    if not ANY_ARRAY.search(statement):
+        return statement, parameters
+    parameters = tuple(json.dumps(value) if isinstance(value, list) else value for value in parameters)
+    return ANY_ARRAY.sub('IN (SELECT value FROM json_each(?))', statement), parameters
+
+
+class StatementCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+
+
+@pytest.fixture
+def client(tmp_path):
+    engine = create_async_engine(f'sqlite+aiosqlite:///{tmp_path}/cves.db')
+    event.listen(engine.sync_engine, 'before_cursor_execute', send_arrays_as_json, retval=True)
+
+    async def seed():
+        async with engine.begin() as conn:
+            for statement in SCHEMA:
+                await conn.exec_driver_sql(statement)
+            for cve_id in CVE_IDS:
+                await conn.exec_driver_sql(
+                    "INSERT INTO cves VALUES (?, 'PUBLISHED', ?, 'mitre', '2024-01-01', '2024-02-01', '2024-03-01')",
+                    (cve_id, '0' * 32),
+                )
+                await conn.exec_driver_sql(
+                    "INSERT INTO cna_containers (title, description, cve_record_id) VALUES ('title', 'description', ?)",
+                    (cve_id,),
+                )
+                await conn.exec_driver_sql(
+                    "INSERT INTO adp_containers (title, description, cve_record_id) VALUES ('title', 'description', ?)",
+                    (cve_id,),
+                )
+
+    asyncio.run(seed())
+    app.state.engine = engine
+    app.state.session_factory = async_sessionmaker(engine)
+    app.state.cache = ResponseCache(100, 60)
+    app.state.counts = CountCache(60)
+    counter = StatementCounter()
+    event.listen(engine.sync_engine, 'before_cursor_execute', counter)
+
+    async def count(method: str, url: str, **kwargs) -> tuple[int, httpx.Response]:
+        counter.count = 0
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url='http://test') as http:
+            response = await http.request(method, url, **kwargs)
+        response.raise_for_status()
+        return counter.count, response
+
+    yield lambda method, url, **kwargs: asyncio.run(count(method, url, **kwargs))
+    asyncio.run(engine.dispose())
+
+
+def test_list(client):
+    # the page and COUNT(*), the total of the whole table is counted once
+    count, response = client('GET', '/cves/', params={'size': 2})
+    assert count == 2
+    assert response.json()['total'] == len(CVE_IDS)
+    assert client('GET', '/cves/', params={'size': 2})[0] == 1
+    # filtered listings are counted every time
+    assert client('GET', '/cves/', params={'year': 2024})[0] == 2
+    # sorted by date_published, the index of state doesn't serve the default sort by id
+    count, response = client('GET', '/cves/', params={'state': 'PUBLISHED'})
+    assert count == 2
+    assert response.json()['total'] == len(CVE_IDS)
+
+
+def test_detail(client):
+    # the record joined with its CNA container and ADP containers
+    count, response = client('GET', f'/cves/{CVE_IDS[0]}')
+    assert count == 2
+    assert response.json()['cna_container']['title'] == 'title'
+    assert len(response.json()['adp_containers']) == 1
+    # then it is cached
+    assert client('GET', f'/cves/{CVE_IDS[0]}')[0] == 0
+
+
+def test_batch_get(client):
+    # records of not cached ids and one IN query per container table
+    count, response = client('POST', '/cves/batch-get', json={'ids': CVE_IDS[:3] + ['CVE-1999-0000']})
+    assert count == 3
+    assert [item['id'] for item in response.json()['items']] == CVE_IDS[:3]
+    assert response.json()['missing'] == ['CVE-1999-0000']
+
+
+def test_export(client):
+    count, response = client('GET', '/cves/export')
+    assert count == 1
+    assert len(response.content.splitlines()) == len(CVE_IDS)
+    # containers of the batch with two IN queries
+    count, response = client('GET', '/cves/export', params={'include_containers': 'true'})
+    assert count == 3
+    assert len(response.content.splitlines()) == len(CVE_IDS)
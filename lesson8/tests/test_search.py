@@ -0,0 +1,27 @@
+import sqlite3
+
+import pytest
+
+from app.pagination import InvalidCursor, dump_cursor
+from app.search import SEARCH_SQL, decode_search_cursor, escape_html
+
+
+def test_headline_text_is_escaped():
+    assert escape_html("concat_ws(' ', page.title, page.description)") in SEARCH_SQL.text
+
+
+@pytest.mark.parametrize('value, escaped', [
+    ('<script>alert(1)</script>', '&lt;script&gt;alert(1)&lt;/script&gt;'),
+    ('a &lt; b', 'a &amp;lt; b'),
+    ('plain text', 'plain text'),
+])
+def test_escape_html(value, escaped):
+    # replace() of SQLite works like the one of Postgres
+    with sqlite3.connect(':memory:') as conn:
+        assert conn.execute(f'SELECT {escape_html("?")}', (value,)).fetchone() == (escaped,)
+
+
+def test_search_cursor():
+    assert decode_search_cursor(dump_cursor([0.0607927, 'CVE-2024-1000'])) == (0.0607927, 'CVE-2024-1000')
+    with pytest.raises(InvalidCursor):
+        decode_search_cursor(dump_cursor(['high', 'CVE-2024-1000']))